@@ -0,0 +1 @@
+"""Micro-benchmarks, run from the repository root, e.g. `python -m benchmarks.interval`."""
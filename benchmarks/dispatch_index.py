@@ -0,0 +1,56 @@
+"""Benchmark of the dispatch index against parsing the planned dispatches on every query.
+
+is_charging_now() used to parse every planned dispatch's start and end on every call. The
+DispatchIndex parses them once per update, and each query is a binary search.
+"""
+from datetime import datetime, timedelta, timezone
+import timeit
+
+from custom_components.octopus_intelligent.dispatch_index import DispatchIndex
+
+NOW = datetime(2024, 2, 25, 12, tzinfo=timezone.utc)
+QUERIES = 200
+
+
+def _dispatches(count: int) -> list[dict]:
+    return [
+        {
+            "startDtUtc": str(NOW + timedelta(hours=i)),
+            "endDtUtc": str(NOW + timedelta(hours=i, minutes=30)),
+            "meta": {"source": "bump-charge" if i % 10 == 0 else "smart-charge"},
+        }
+        for i in range(count)
+    ]
+
+
+def is_charging_now(planned_dispatches, utcnow, source=None) -> bool:
+    """The replaced implementation, as of the initial commit."""
+    for state in planned_dispatches:
+        if source is None or state.get('meta', {}).get('source', '') == source:
+            startUtc = datetime.strptime(state.get('startDtUtc'), '%Y-%m-%d %H:%M:%S%z').astimezone(timezone.utc)
+            endUtc = datetime.strptime(state.get('endDtUtc'), '%Y-%m-%d %H:%M:%S%z').astimezone(timezone.utc)
+            if startUtc <= utcnow <= endUtc:
+                return True
+    return False
+
+
+def main():
+    for count in (10, 100, 1000):
+        dispatches = _dispatches(count)
+        points = [NOW + timedelta(minutes=13 * i) for i in range(QUERIES)]
+        index = DispatchIndex(dispatches)
+        for point in points:
+            for source in (None, "smart-charge"):
+                assert is_charging_now(dispatches, point, source) == index.contains(point, source)
+
+        old_s = min(timeit.repeat(lambda: [is_charging_now(dispatches, p) for p in points], number=1, repeat=3))
+        build_s = min(timeit.repeat(lambda: DispatchIndex(dispatches), number=1, repeat=3))
+        new_s = min(timeit.repeat(lambda: [index.contains(p) for p in points], number=1, repeat=3))
+        print(
+            f"{count:5} dispatches: parse and scan {old_s / QUERIES * 1e6:8.1f} us/query, "
+            f"index {new_s / QUERIES * 1e6:5.2f} us/query + {build_s * 1e3:6.2f} ms/update"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Benchmark of parsing the GraphQL documents on every call against memoizing them.
+
+The client used to call gql() on each operation's source on every call, and built (and
+parsed) a new setDevicePreferences document every time the charge preferences were set.
+"""
+import timeit
+
+from gql import gql
+
+from custom_components.octopus_intelligent import graphql_client
+
+CALLS = 1000
+
+DOCUMENTS = {
+    name.strip("_").lower(): source
+    for name, source in vars(graphql_client).items()
+    if name.endswith(("_QUERY", "_MUTATION")) and isinstance(source, str)
+}
+
+
+def _us_per_call(func) -> float:
+    return min(timeit.repeat(func, number=CALLS, repeat=5)) / CALLS * 1e6
+
+
+def main():
+    for name, source in DOCUMENTS.items():
+        before = _us_per_call(lambda: gql(source))
+        after = _us_per_call(lambda: graphql_client._document(source))  # pylint: disable=protected-access
+        print(f"{name:32} parse {before:7.1f} us/call, memoized {after:5.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
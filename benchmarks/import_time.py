@@ -0,0 +1,84 @@
+"""Benchmark of the time it takes to import the integration, with `python -X importtime`.
+
+Home Assistant's modules that the integration uses are imported first, as they're already
+loaded when Home Assistant sets up the integration. The GraphQL stack (gql and
+graphql-core) should not be imported with the integration, but later in an executor; the
+time it would add is shown for comparison.
+"""
+import subprocess
+import sys
+
+MARKER = "--- benchmark marker ---"
+
+PRELOADED = (
+    "homeassistant.components.binary_sensor",
+    "homeassistant.components.diagnostics",
+    "homeassistant.components.recorder",
+    "homeassistant.components.select",
+    "homeassistant.components.sensor",
+    "homeassistant.components.switch",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.update_coordinator",
+    "aiohttp",
+)
+
+INTEGRATION = (
+    "custom_components.octopus_intelligent",
+    "custom_components.octopus_intelligent.binary_sensor",
+    "custom_components.octopus_intelligent.config_flow",
+    "custom_components.octopus_intelligent.diagnostics",
+    "custom_components.octopus_intelligent.select",
+    "custom_components.octopus_intelligent.sensor",
+    "custom_components.octopus_intelligent.switch",
+)
+
+GQL = ("gql", "gql.transport.aiohttp", "gql.transport.exceptions")
+
+SCRIPT = f"""
+import importlib, sys
+for phase in ({PRELOADED!r}, {INTEGRATION!r}, {GQL!r}):
+    for module in phase:
+        importlib.import_module(module)
+    sys.stderr.write({MARKER!r} + "\\n")
+    sys.stderr.flush()
+"""
+
+
+def _phases(stderr: str) -> list[list[tuple[int, str]]]:
+    """Return the (self time in us, module) imported in each phase of the script."""
+    phases: list[list[tuple[int, str]]] = [[]]
+    for line in stderr.splitlines():
+        if line == MARKER:
+            phases.append([])
+        elif line.startswith("import time:") and "|" in line:
+            self_us, _, module = line[len("import time:"):].split("|")
+            if self_us.strip().isdigit():
+                phases[-1].append((int(self_us), module.strip()))
+    return phases
+
+
+def main(runs: int = 5):
+    results = []
+    for _ in range(runs):
+        stderr = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", SCRIPT],
+            capture_output=True, text=True, check=True,
+        ).stderr
+        results.append(_phases(stderr))
+    # The fastest run, as the others were slowed down by something else
+    _, integration, gql, _ = min(results, key=lambda phases: sum(us for us, _ in phases[1]))
+
+    def total_ms(phase):
+        return sum(us for us, _ in phase) / 1000
+
+    print(f"Integration: {total_ms(integration):6.1f} ms, {len(integration)} modules")
+    for self_us, module in sorted(integration, reverse=True)[:5]:
+        print(f"  {self_us / 1000:6.1f} ms  {module}")
+    imported = {module.split(".")[0] for _, module in integration}
+    print(f"GraphQL stack imported with the integration: {bool(imported & {'gql', 'graphql'})}")
+    print(f"GraphQL stack, imported later: {total_ms(gql):6.1f} ms, {len(gql)} modules")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark of IntervalSet against the merge_and_sort_time_ranges it replaced.
+
+The next off-peak range used to be found by merging the off-peak windows and the smart
+charge dispatches, and scanning them, on every lookup. An IntervalSet is merged once per
+update, and each lookup is a binary search.
+"""
+from datetime import datetime, timedelta, timezone
+import timeit
+
+from custom_components.octopus_intelligent.interval import IntervalSet
+
+NOW = datetime(2024, 2, 25, 12, tzinfo=timezone.utc)
+LOOKUPS = 1000
+
+
+def merge_and_sort_time_ranges(date_ranges: list) -> list:
+    """The replaced implementation, as of the initial commit."""
+    date_ranges.sort(key=lambda r: r["start"])
+    merged_date_ranges = []
+    current_date_range = date_ranges[0]
+    for i in range(1, len(date_ranges)):
+        if current_date_range["end"] >= date_ranges[i]["start"]:
+            current_date_range["end"] = max(current_date_range["end"], date_ranges[i]["end"])
+        else:
+            merged_date_ranges.append(current_date_range)
+            current_date_range = date_ranges[i]
+    merged_date_ranges.append(current_date_range)
+    return merged_date_ranges
+
+
+def _ranges(dispatches: int) -> list[tuple[datetime, datetime]]:
+    """Return 3 daily off-peak windows, and half hour dispatches every hour from now."""
+    day = NOW.replace(hour=0)
+    ranges = [
+        (day + timedelta(days=d, hours=23, minutes=30), day + timedelta(days=d + 1, hours=5, minutes=30))
+        for d in range(-1, 2)
+    ]
+    ranges.extend(
+        (NOW + timedelta(hours=h), NOW + timedelta(hours=h, minutes=30)) for h in range(dispatches)
+    )
+    return ranges
+
+
+def _old_next_range(ranges, utcnow):
+    merged = merge_and_sort_time_ranges([{"start": start, "end": end} for start, end in ranges])
+    for offpeak_range in merged:
+        if offpeak_range["start"] <= utcnow <= offpeak_range["end"] or utcnow <= offpeak_range["start"]:
+            return offpeak_range
+    return None
+
+
+def main():
+    for dispatches in (0, 10, 40):
+        ranges = _ranges(dispatches)
+        points = [NOW + timedelta(minutes=7 * i) for i in range(LOOKUPS)]
+        for point in points[::50]:
+            old = _old_next_range(ranges, point)
+            new = IntervalSet(ranges).interval_from(point)
+            assert (old and (old["start"], old["end"])) == (new and tuple(new))
+
+        old_s = min(timeit.repeat(lambda: [_old_next_range(ranges, p) for p in points], number=1, repeat=5))
+        build_s = min(timeit.repeat(lambda: IntervalSet(ranges), number=100, repeat=5)) / 100
+        intervals = IntervalSet(ranges)
+        new_s = min(timeit.repeat(lambda: [intervals.interval_from(p) for p in points], number=1, repeat=5))
+        print(
+            f"{len(ranges):3} ranges: merge and scan {old_s / LOOKUPS * 1e6:7.2f} us/lookup, "
+            f"IntervalSet {new_s / LOOKUPS * 1e6:5.2f} us/lookup + {build_s * 1e6:6.2f} us/build"
+        )
+
+
+if __name__ == "__main__":
+    main()
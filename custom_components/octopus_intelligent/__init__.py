@@ -1,6 +1,13 @@
 """Support for Octopus Intelligent Tariff in the UK."""
+import asyncio
+from datetime import timedelta
 import logging
-from .octopus_intelligent_system import OctopusIntelligentSystem
+import time
+
+from .octopus_intelligent_system import (
+    OctopusIntelligentSystem,
+    async_remove_persistent_data,
+)
 
 
 import homeassistant.util.dt as dt_util
@@ -8,8 +15,9 @@ import homeassistant.util.dt as dt_util
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     CONF_API_KEY,
+    EVENT_HOMEASSISTANT_STOP,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import Event, HomeAssistant
 
 from .const import(
     DOMAIN,
@@ -17,8 +25,17 @@ from .const import(
 
     CONF_ACCOUNT_ID,
     CONF_OFFPEAK_START,
-    CONF_OFFPEAK_END
+    CONF_OFFPEAK_END,
+    CONF_OFFPEAK_HORIZON_DAYS,
+    CONF_OFFPEAK_HORIZON_DAYS_DEFAULT,
+    CONF_SCHEMA_DRIFT_CHECK,
+    CONF_SCHEMA_DRIFT_CHECK_DEFAULT,
+    CONF_POLL_INTERVAL_MIN,
+    CONF_POLL_INTERVAL_MIN_DEFAULT,
+    CONF_POLL_INTERVAL_MAX,
+    CONF_POLL_INTERVAL_MAX_DEFAULT,
 )
+from .services import async_setup_services
 from .util import to_timedelta
 
 _LOGGER = logging.getLogger(__name__)
@@ -30,42 +47,92 @@ async def async_setup(hass: HomeAssistant, config: dict):
 
     if DOMAIN not in hass.data:
         hass.data[DOMAIN] = {}
-    
+
+    async_setup_services(hass)
     return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     _LOGGER.debug("Setting up Octopus Intelligent System component")
+    setup_started = time.monotonic()
 
     octopus_system = OctopusIntelligentSystem(
         hass,
         api_key=entry.data[CONF_API_KEY],
         account_id=entry.data[CONF_ACCOUNT_ID],
         off_peak_start=to_timedelta(entry.data[CONF_OFFPEAK_START]),
-        off_peak_end=to_timedelta(entry.data[CONF_OFFPEAK_END])
+        off_peak_end=to_timedelta(entry.data[CONF_OFFPEAK_END]),
+        offpeak_horizon_days=entry.data.get(
+            CONF_OFFPEAK_HORIZON_DAYS, CONF_OFFPEAK_HORIZON_DAYS_DEFAULT
+        ),
+        schema_drift_check=entry.data.get(
+            CONF_SCHEMA_DRIFT_CHECK, CONF_SCHEMA_DRIFT_CHECK_DEFAULT
+        ),
+        poll_interval_min=timedelta(
+            seconds=entry.data.get(CONF_POLL_INTERVAL_MIN, CONF_POLL_INTERVAL_MIN_DEFAULT)
+        ),
+        poll_interval_max=timedelta(
+            seconds=entry.data.get(CONF_POLL_INTERVAL_MAX, CONF_POLL_INTERVAL_MAX_DEFAULT)
+        ),
     )
 
     try:
-        await octopus_system.start()
+        cached_data_loaded = await octopus_system.async_load()
     except Exception as ex:
         _LOGGER.error("Got error when setting up Octopus Intelligent Integration: %s", ex)
+        await octopus_system.stop()
         return False
 
+    if not cached_data_loaded:
+        # Validate the account while fetching the data; they share the token
+        start_result, refresh_result = await asyncio.gather(
+            octopus_system.start(),
+            octopus_system.async_config_entry_first_refresh(),
+            return_exceptions=True,
+        )
+        if isinstance(start_result, BaseException):
+            _LOGGER.error("Got error when setting up Octopus Intelligent Integration: %s", start_result)
+            await octopus_system.stop()
+            return False
+        if isinstance(refresh_result, BaseException):
+            await octopus_system.stop()
+            raise refresh_result
+
     if entry.entry_id not in hass.data[DOMAIN]:
         hass.data[DOMAIN][entry.entry_id] = {}
 
     hass.data[DOMAIN][entry.entry_id][OCTOPUS_SYSTEM] = octopus_system
 
-    await octopus_system.async_config_entry_first_refresh()        
+    if cached_data_loaded:
+        # Set the entities up from the data cached before the restart right away, rather
+        # than hold up the startup on the API
+        entry.async_create_background_task(
+            hass,
+            octopus_system.async_start_and_refresh(),
+            f"{DOMAIN} {entry.data[CONF_ACCOUNT_ID]} start",
+        )
 
-    #hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, lambda event: octopus_system.stop())
+    async def _async_on_hass_stop(_: Event):
+        await octopus_system.stop()
+
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_on_hass_stop)
+    )
+    # Apply changes made in the options flow, e.g. added look-ahead sensors
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    octopus_system.startup_timings["setup_entry_ms"] = round((time.monotonic() - setup_started) * 1000, 1)
 
     _LOGGER.debug("Octopus Intelligent System component setup finished")
     return True
 
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry after its configuration was changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload Octopus Intelligent config entry."""
     _LOGGER.debug("Unloading Octopus Intelligent System component")
@@ -81,7 +148,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             )
             if octopus_system:
                 try:
-                    await octopus_system.async_remove_entry()
+                    await octopus_system.async_unload()
                 except Exception as ex:  # pylint: disable=broad-exception-caught
                     _LOGGER.error("Error during unload: %s", ex)
             
@@ -94,10 +161,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
 async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Called when the config entry is removed (the integration is deleted)."""
-    octopus_system: OctopusIntelligentSystem = (
-        hass.data[DOMAIN][entry.entry_id][OCTOPUS_SYSTEM]
-    )
+    # The entry has already been unloaded, so there is no running system instance.
     try:
-        await octopus_system.async_remove_entry()
+        await async_remove_persistent_data(hass, entry.data[CONF_ACCOUNT_ID])
     except Exception as ex:  # pylint: disable=broad-exception-caught
         _LOGGER.error(ex)
@@ -1,15 +1,17 @@
-from gc import callbacks
+from datetime import timedelta
 from homeassistant.components.binary_sensor import (
     BinarySensorEntity,
 )
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
+from .entity import OctopusIntelligentEntity
+from .const import (
+    DOMAIN,
+    OCTOPUS_SYSTEM,
+    CONF_LOOK_AHEAD_MINUTES,
+    LOOK_AHEAD_MINUTES_BUILT_IN,
 )
-from homeassistant.helpers.event import (
-    async_track_utc_time_change
-)
-from .const import DOMAIN, OCTOPUS_SYSTEM
+from .dispatch_index import parse_dispatch_time
+from .interval import IntervalSet
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import callback, HomeAssistant
 from homeassistant.util import slugify
@@ -22,74 +24,137 @@ async def async_setup_entry(
     config_entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ):
+    octopus_system = hass.data[DOMAIN][config_entry.entry_id][OCTOPUS_SYSTEM]
+    look_ahead_minutes = sorted(
+        set(config_entry.data.get(CONF_LOOK_AHEAD_MINUTES, [])) - set(LOOK_AHEAD_MINUTES_BUILT_IN)
+    )
     async_add_entities([
         OctopusIntelligentSlot(
             hass, 
-            hass.data[DOMAIN][config_entry.entry_id][OCTOPUS_SYSTEM],
+            octopus_system,
             "Octopus Intelligent Slot",
             True,
             0),
-        OctopusIntelligentSlot(
-            hass, 
-            hass.data[DOMAIN][config_entry.entry_id][OCTOPUS_SYSTEM],
-            "Octopus Intelligent Slot (next 1 hour)",
-            False,
-            60),
-        OctopusIntelligentSlot(
-            hass, 
-            hass.data[DOMAIN][config_entry.entry_id][OCTOPUS_SYSTEM],
-            "Octopus Intelligent Slot (next 2 hours)",
-            False,
-            120),
-        OctopusIntelligentSlot(
-            hass, 
-            hass.data[DOMAIN][config_entry.entry_id][OCTOPUS_SYSTEM],
-            "Octopus Intelligent Slot (next 3 hours)",
-            False,
-            180),
+        *[
+            OctopusIntelligentSlot(
+                hass,
+                octopus_system,
+                f"Octopus Intelligent Slot (next {look_ahead_name(mins)})",
+                False,
+                mins)
+            for mins in [*LOOK_AHEAD_MINUTES_BUILT_IN, *look_ahead_minutes]
+        ],
         OctopusIntelligentPlannedDispatchSlot(
             hass, 
-            hass.data[DOMAIN][config_entry.entry_id][OCTOPUS_SYSTEM],
+            octopus_system,
             "Octopus Intelligent Planned Dispatch Slot")
     ], False)  # False: data was already fetched by __init__.py async_setup_entry()
 
 
-class OctopusIntelligentSlot(CoordinatorEntity, BinarySensorEntity):
+def look_ahead_name(mins: int) -> str:
+    """Return e.g. '1 hour', '2 hours' or '45 minutes'."""
+    if mins % 60 == 0:
+        hours = mins // 60
+        return f"{hours} hour" if hours == 1 else f"{hours} hours"
+    return f"{mins} minutes"
+
+
+# The raw Octopus API response, kept as attributes for templates but too large to record
+RAW_DATA_ATTRIBUTES = frozenset({
+    "vehicleChargingPreferences",
+    "registeredKrakenflexDevice",
+    "plannedDispatches",
+    "completedDispatches",
+    "devices",
+})
+
+
+def _epoch_ranges(intervals: IntervalSet) -> list[list[int]]:
+    return [[int(start.timestamp()), int(end.timestamp())] for start, end in intervals]
+
+
+def _dispatch_attributes(dispatches, intervals: IntervalSet, prefix: str) -> dict:
+    charge_kwh = 0.0
+    for dispatch in dispatches or []:
+        try:
+            # The API reports the energy charged as a negative delta
+            charge_kwh += abs(float(dispatch.get("chargeKwh") or 0))
+        except (TypeError, ValueError):
+            continue
+    return {
+        f"{prefix}_dispatches": _epoch_ranges(intervals),
+        f"{prefix}_charge_kwh": round(charge_kwh, 3),
+    }
+
+
+def compact_slot_attributes(octopus_system) -> dict:
+    """Return the state attributes of the main slot sensor.
+
+    The dispatches are summarised as merged [start, end] Unix timestamp pairs and kWh
+    totals. The raw API response is also included, but excluded from the recorder.
+    """
+    data = octopus_system.data or {}
+    completed = []
+    for dispatch in data.get("completedDispatches") or []:
+        try:
+            completed.append(
+                (parse_dispatch_time(dispatch["startDtUtc"]), parse_dispatch_time(dispatch["endDtUtc"]))
+            )
+        except (KeyError, TypeError, ValueError):
+            continue
+    return {
+        **_dispatch_attributes(
+            data.get("plannedDispatches"), octopus_system.dispatch_index.intervals(), "planned"
+        ),
+        **_dispatch_attributes(
+            data.get("completedDispatches"), IntervalSet(completed), "completed"
+        ),
+        **{key: value for key, value in data.items() if key in RAW_DATA_ATTRIBUTES},
+    }
+
+
+class OctopusIntelligentSlot(OctopusIntelligentEntity, BinarySensorEntity):
+    _unrecorded_attributes = RAW_DATA_ATTRIBUTES
+
     def __init__(self, hass, octopus_system, name : str, store_attributes : bool = False, look_ahead_mins : int = 0) -> None:
         """Initialize the binary sensor."""
+        super().__init__(octopus_system)
         self._name = name
         self._unique_id = slugify(name)
-        self._octopus_system = octopus_system
         self._store_attributes = store_attributes
         self._look_ahead_mins = look_ahead_mins
-        self._attributes = {}
+        self._attributes = compact_slot_attributes(octopus_system) if store_attributes else {}
         self._is_on = self._is_off_peak()
-        
-        super().__init__(octopus_system)
-        self._timer = async_track_utc_time_change(
-            hass, self.timer_update, minute=range(0, 60, 30), second=1)
+
+    async def async_added_to_hass(self) -> None:
+        """Update the state whenever an off-peak period in the look-ahead starts or ends."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._octopus_system.state_scheduler.async_add_listener(
+                self._is_off_peak,
+                self.timer_update,
+                # The window [now, now + look-ahead] enters an off-peak period at its
+                # start, and leaves it when the end of the window reaches the period's end.
+                {timedelta(0), timedelta(minutes=self._look_ahead_mins)},
+            )
+        )
 
     def _is_off_peak(self):
-        mins_looked = 0
-        while (mins_looked <= self._look_ahead_mins):
-            if not self._octopus_system.is_off_peak_now(mins_looked):
-                return False
-            mins_looked += 30
-        return True
+        return self._octopus_system.is_off_peak_for(self._look_ahead_mins)
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
         self._is_on = self._is_off_peak()
         if (self._store_attributes):
-            self._attributes = self.coordinator.data
-        self.async_write_ha_state()
+            self._attributes = compact_slot_attributes(self._octopus_system)
+        self.async_write_ha_state_if_changed()
 
     @callback
-    async def timer_update(self, time):
-        """Refresh state when timer is fired."""
+    def timer_update(self):
+        """Refresh state when an off-peak period starts or ends."""
         self._is_on = self._is_off_peak()
-        self.async_write_ha_state()
+        self.async_write_ha_state_if_changed()
 
     @property
     def name(self):
@@ -109,51 +174,43 @@ class OctopusIntelligentSlot(CoordinatorEntity, BinarySensorEntity):
     @property
     def extra_state_attributes(self):
         """Attributes of the sensor."""
-        return self._attributes
+        return self._with_stale_data_attributes(self._attributes)
         
     @property
-    def device_info(self):
-        return {
-            "identifiers": {
-                ("AccountID", self._octopus_system.account_id),
-            },
-            "name": "Octopus Intelligent Tariff",
-            "manufacturer": "Octopus",
-        }        
-    @property
     def icon(self):
         """Icon of the entity."""
         return "mdi:home-lightning-bolt-outline"
 
-    async def async_will_remove_from_hass(self):
-        """Unsubscribe when removed."""
-        self._timer()
-
 
-class OctopusIntelligentPlannedDispatchSlot(CoordinatorEntity, BinarySensorEntity):
+class OctopusIntelligentPlannedDispatchSlot(OctopusIntelligentEntity, BinarySensorEntity):
     def __init__(self, hass, octopus_system, name : str) -> None:
         """Initialize the binary sensor."""
+        super().__init__(octopus_system)
         self._name = name
         self._unique_id = slugify(name)
-        self._octopus_system = octopus_system
         self._attributes = {}
         self._is_on = self._octopus_system.is_off_peak_charging_now()
-        
-        super().__init__(octopus_system)
-        self._timer = async_track_utc_time_change(
-            hass, self.timer_update, minute=range(0, 60, 30), second=1)
-        
+
+    async def async_added_to_hass(self) -> None:
+        """Update the state whenever a smart charge dispatch starts or ends."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._octopus_system.state_scheduler.async_add_listener(
+                self._octopus_system.is_off_peak_charging_now, self.timer_update
+            )
+        )
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
         self._is_on = self._octopus_system.is_off_peak_charging_now()
-        self.async_write_ha_state()
+        self.async_write_ha_state_if_changed()
 
     @callback
-    async def timer_update(self, time):
-        """Refresh state when timer is fired."""
+    def timer_update(self):
+        """Refresh state when a dispatch starts or ends."""
         self._is_on = self._octopus_system.is_off_peak_charging_now()
-        self.async_write_ha_state()
+        self.async_write_ha_state_if_changed()
 
     @property
     def name(self):
@@ -171,20 +228,7 @@ class OctopusIntelligentPlannedDispatchSlot(CoordinatorEntity, BinarySensorEntit
         return self._is_on
         
     @property
-    def device_info(self):
-        return {
-            "identifiers": {
-                ("AccountID", self._octopus_system.account_id),
-            },
-            "name": "Octopus Intelligent Tariff",
-            "manufacturer": "Octopus",
-        }        
-    @property
     def icon(self):
         """Icon of the entity."""
         return "mdi:ev-station"
 
-    async def async_will_remove_from_hass(self):
-        """Unsubscribe when removed."""
-        self._timer()
-
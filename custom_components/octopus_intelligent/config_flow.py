@@ -13,6 +13,7 @@ from homeassistant.const import (
 )
 
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .const import (
     DOMAIN,
@@ -21,6 +22,17 @@ from .const import (
     CONF_OFFPEAK_START_DEFAULT,
     CONF_OFFPEAK_END,
     CONF_OFFPEAK_END_DEFAULT,
+    CONF_OFFPEAK_HORIZON_DAYS,
+    CONF_OFFPEAK_HORIZON_DAYS_DEFAULT,
+    CONF_OFFPEAK_HORIZON_DAYS_MAX,
+    CONF_SCHEMA_DRIFT_CHECK,
+    CONF_SCHEMA_DRIFT_CHECK_DEFAULT,
+    CONF_LOOK_AHEAD_MINUTES,
+    LOOK_AHEAD_MINUTES_MAX,
+    CONF_POLL_INTERVAL_MIN,
+    CONF_POLL_INTERVAL_MIN_DEFAULT,
+    CONF_POLL_INTERVAL_MAX,
+    CONF_POLL_INTERVAL_MAX_DEFAULT,
     INTELLIGENT_24HR_TIMES
 )
 from .graphql_util import InvalidAuthError, validate_octopus_account
@@ -59,7 +71,7 @@ class OctopusIntelligentConfigFlowHandler(config_entries.ConfigFlow, domain=DOMA
 
         errors = {}
         try:
-            await try_connection(user_input[CONF_API_KEY], user_input[CONF_ACCOUNT_ID])
+            await try_connection(self.hass, user_input[CONF_API_KEY], user_input[CONF_ACCOUNT_ID])
         except Exception as ex:  # pylint: disable=broad-except
             _LOGGER.error(ex)
             if isinstance(ex, InvalidAuthError):
@@ -106,9 +118,17 @@ class OctopusIntelligentOptionsFlowHandler(config_entries.OptionsFlow):
         errors = {}
         
         if user_input is not None:
+            try:
+                look_ahead_minutes = parse_look_ahead_minutes(user_input.get(CONF_LOOK_AHEAD_MINUTES, ""))
+            except ValueError:
+                errors["base"] = "invalid_look_ahead"
+            if user_input[CONF_POLL_INTERVAL_MIN] > user_input[CONF_POLL_INTERVAL_MAX]:
+                errors["base"] = "invalid_poll_interval"
+
+        if user_input is not None and not errors:
             # Validate the API key and account ID if they were changed
             try:
-                await try_connection(user_input[CONF_API_KEY], user_input[CONF_ACCOUNT_ID])
+                await try_connection(self.hass, user_input[CONF_API_KEY], user_input[CONF_ACCOUNT_ID])
                 
                 # Update the config entry data with new values
                 new_data = {
@@ -117,6 +137,11 @@ class OctopusIntelligentOptionsFlowHandler(config_entries.OptionsFlow):
                     CONF_ACCOUNT_ID: user_input[CONF_ACCOUNT_ID],
                     CONF_OFFPEAK_START: user_input[CONF_OFFPEAK_START],
                     CONF_OFFPEAK_END: user_input[CONF_OFFPEAK_END],
+                    CONF_OFFPEAK_HORIZON_DAYS: user_input[CONF_OFFPEAK_HORIZON_DAYS],
+                    CONF_SCHEMA_DRIFT_CHECK: user_input[CONF_SCHEMA_DRIFT_CHECK],
+                    CONF_LOOK_AHEAD_MINUTES: look_ahead_minutes,
+                    CONF_POLL_INTERVAL_MIN: user_input[CONF_POLL_INTERVAL_MIN],
+                    CONF_POLL_INTERVAL_MAX: user_input[CONF_POLL_INTERVAL_MAX],
                 }
                 
                 self.hass.config_entries.async_update_entry(
@@ -150,6 +175,26 @@ class OctopusIntelligentOptionsFlowHandler(config_entries.OptionsFlow):
             CONF_OFFPEAK_END,
             default=self.config_entry.data.get(CONF_OFFPEAK_END, CONF_OFFPEAK_END_DEFAULT)
         )] = vol.In(INTELLIGENT_24HR_TIMES)
+        fields[vol.Required(
+            CONF_OFFPEAK_HORIZON_DAYS,
+            default=self.config_entry.data.get(CONF_OFFPEAK_HORIZON_DAYS, CONF_OFFPEAK_HORIZON_DAYS_DEFAULT)
+        )] = vol.All(vol.Coerce(int), vol.Range(min=1, max=CONF_OFFPEAK_HORIZON_DAYS_MAX))
+        fields[vol.Required(
+            CONF_SCHEMA_DRIFT_CHECK,
+            default=self.config_entry.data.get(CONF_SCHEMA_DRIFT_CHECK, CONF_SCHEMA_DRIFT_CHECK_DEFAULT)
+        )] = bool
+        fields[vol.Optional(
+            CONF_LOOK_AHEAD_MINUTES,
+            default=", ".join(str(mins) for mins in self.config_entry.data.get(CONF_LOOK_AHEAD_MINUTES, []))
+        )] = str
+        fields[vol.Required(
+            CONF_POLL_INTERVAL_MIN,
+            default=self.config_entry.data.get(CONF_POLL_INTERVAL_MIN, CONF_POLL_INTERVAL_MIN_DEFAULT)
+        )] = vol.All(vol.Coerce(int), vol.Range(min=30, max=3600))
+        fields[vol.Required(
+            CONF_POLL_INTERVAL_MAX,
+            default=self.config_entry.data.get(CONF_POLL_INTERVAL_MAX, CONF_POLL_INTERVAL_MAX_DEFAULT)
+        )] = vol.All(vol.Coerce(int), vol.Range(min=30, max=3600))
 
         return self.async_show_form(
             step_id="user", 
@@ -158,9 +203,24 @@ class OctopusIntelligentOptionsFlowHandler(config_entries.OptionsFlow):
         )
 
 
-async def try_connection(api_key: str, account_id: str):
+def parse_look_ahead_minutes(value: str) -> list[int]:
+    """Parse a comma separated list of look-ahead durations in minutes, e.g. '45, 90'."""
+    look_ahead_minutes = set()
+    for item in value.split(","):
+        if item.strip():
+            mins = int(item)
+            if not 1 <= mins <= LOOK_AHEAD_MINUTES_MAX:
+                raise ValueError(f"Look-ahead out of range: {mins}")
+            look_ahead_minutes.add(mins)
+    return sorted(look_ahead_minutes)
+
+
+async def try_connection(hass, api_key: str, account_id: str):
     """Try connecting to the Octopus API and validating the given account_id."""
     _LOGGER.debug("Trying to connect to Octopus during setup")
-    client = OctopusEnergyGraphQLClient(api_key)
-    await validate_octopus_account(client, account_id)
+    client = OctopusEnergyGraphQLClient(api_key, async_get_clientsession(hass))
+    try:
+        await validate_octopus_account(client, account_id)
+    finally:
+        await client.async_close()
     _LOGGER.debug("Successfully connected to Octopus during setup")
@@ -25,6 +25,27 @@ CONF_OFFPEAK_END: Final = "offpeak_end"
 CONF_OFFPEAK_START_DEFAULT: Final = "23:30"
 CONF_OFFPEAK_END_DEFAULT: Final = "05:30"
 
+CONF_OFFPEAK_HORIZON_DAYS: Final = "offpeak_horizon_days"
+CONF_OFFPEAK_HORIZON_DAYS_DEFAULT: Final = 2
+CONF_OFFPEAK_HORIZON_DAYS_MAX: Final = 14
+
+# How far ahead the plan_window service's deadline may be, in days
+PLAN_DEADLINE_MAX_DAYS: Final = 14
+
+CONF_SCHEMA_DRIFT_CHECK: Final = "schema_drift_check"
+CONF_SCHEMA_DRIFT_CHECK_DEFAULT: Final = False
+
+# Additional "Octopus Intelligent Slot (next ...)" sensors, as look-ahead durations in minutes
+CONF_LOOK_AHEAD_MINUTES: Final = "look_ahead_minutes"
+LOOK_AHEAD_MINUTES_BUILT_IN: Final = [60, 120, 180]
+LOOK_AHEAD_MINUTES_MAX: Final = 24 * 60
+
+# Limits of the adaptive polling interval, in seconds
+CONF_POLL_INTERVAL_MIN: Final = "poll_interval_min"
+CONF_POLL_INTERVAL_MIN_DEFAULT: Final = 60
+CONF_POLL_INTERVAL_MAX: Final = "poll_interval_max"
+CONF_POLL_INTERVAL_MAX_DEFAULT: Final = 900
+
 # a hardcoded array of time strings in HH:mm every 30 mins for 24 hours
 INTELLIGENT_MINS_PAST_HOURS: Final = [0, 30]
 INTELLIGENT_24HR_TIMES: Final = [f"{hour:02}:{mins:02}" for hour in range(24) for mins in INTELLIGENT_MINS_PAST_HOURS]
@@ -0,0 +1,29 @@
+"""Diagnostics support for Octopus Intelligent."""
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_API_KEY
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, OCTOPUS_SYSTEM
+from .octopus_intelligent_system import OctopusIntelligentSystem
+
+TO_REDACT = {CONF_API_KEY}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    octopus_system: OctopusIntelligentSystem = (
+        hass.data[DOMAIN][entry.entry_id][OCTOPUS_SYSTEM]
+    )
+    return {
+        "entry": async_redact_data(entry.data, TO_REDACT),
+        "token": octopus_system.client.token_manager.diagnostics,
+        "startup": octopus_system.startup_timings,
+        "polling": octopus_system.poll_stats,
+        "state_writes": octopus_system.write_stats,
+        "mutation_queue": octopus_system.mutation_queue.stats,
+    }
@@ -0,0 +1,153 @@
+"""Durable, append-only history of completed dispatches."""
+import logging
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from typing import Any, NamedTuple
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# Completed dispatches older than this are dropped from the history.
+DISPATCH_HISTORY_RETENTION = timedelta(days=400)
+
+# Dispatch slots older than this are merged with any adjacent slot of the same
+# source and location, as the exact half hour slots are no longer interesting.
+DISPATCH_HISTORY_COMPACT_AFTER = timedelta(days=7)
+
+# Writes are batched, to limit wear on SD cards (pending writes are flushed when
+# Home Assistant stops).
+DISPATCH_HISTORY_SAVE_DELAY = 900
+
+
+class CompletedDispatch(NamedTuple):
+    """A completed dispatch, in the compact form kept in the history."""
+
+    start: int  # Unix timestamp
+    end: int  # Unix timestamp
+    charge_kwh: float
+    source: str | None
+    location: str | None
+
+    @classmethod
+    def from_api(cls, dispatch: dict[str, Any]) -> "CompletedDispatch":
+        """Create from a `completedDispatches` entry of the Octopus API response."""
+        meta = dispatch.get("meta") or {}
+        return cls(
+            int(datetime.fromisoformat(dispatch["startDtUtc"]).timestamp()),
+            int(datetime.fromisoformat(dispatch["endDtUtc"]).timestamp()),
+            float(dispatch.get("chargeKwh") or 0),
+            meta.get("source"),
+            meta.get("location"),
+        )
+
+
+class DispatchHistory:
+    """History of completed dispatches, persisted in Home Assistant's storage.
+
+    The Octopus API only returns recent completed dispatches, with every poll returning
+    mostly the same ones. Only dispatches that ended after the last one already in the
+    history are appended, so the history stays sorted and each dispatch is stored once.
+    """
+
+    def __init__(self, hass: HomeAssistant, account_id: str):
+        self._store = Store[dict[str, Any]](
+            hass=hass,
+            key=f"{DOMAIN}.{account_id}.dispatch_history",
+            version=1,
+            minor_version=1,
+        )
+        self.dispatches: list[CompletedDispatch] = []
+
+    @property
+    def last_end(self) -> int | None:
+        """Return the end (Unix timestamp) of the latest dispatch in the history."""
+        return self.dispatches[-1].end if self.dispatches else None
+
+    async def load(self):
+        """Load the history from persistent storage."""
+        data = None
+        try:
+            data = await self._store.async_load()
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            _LOGGER.error(ex)
+        if isinstance(data, dict):
+            try:
+                self.dispatches = [CompletedDispatch(*d) for d in data.get("dispatches", [])]
+            except TypeError as ex:
+                _LOGGER.error("Ignoring invalid completed dispatch history: %s", ex)
+
+    def ingest(
+        self,
+        completed_dispatches: list[dict[str, Any]] | None,
+        missing_source: Callable[[CompletedDispatch], str | None] | None = None,
+    ) -> list[CompletedDispatch]:
+        """Append the dispatches that are newer than the history, and return them.
+
+        The API usually returns completed dispatches without a source; `missing_source`
+        is then called to determine it.
+        """
+        last_end = self.last_end or 0
+        new_dispatches = []
+        for dispatch in completed_dispatches or []:
+            try:
+                completed = CompletedDispatch.from_api(dispatch)
+            except (KeyError, TypeError, ValueError) as ex:
+                _LOGGER.debug("Ignoring invalid completed dispatch %s: %s", dispatch, ex)
+                continue
+            if completed.end <= last_end:
+                continue
+            if not completed.source and missing_source is not None:
+                completed = completed._replace(source=missing_source(completed))
+            new_dispatches.append(completed)
+        if new_dispatches:
+            new_dispatches.sort()
+            self.dispatches.extend(new_dispatches)
+            self._compact()
+            self._store.async_delay_save(self._data_to_save, DISPATCH_HISTORY_SAVE_DELAY)
+        return new_dispatches
+
+    def _compact(self):
+        """Drop expired dispatches and merge adjacent old ones."""
+        now = time.time()
+        expired = now - DISPATCH_HISTORY_RETENTION.total_seconds()
+        compact_before = now - DISPATCH_HISTORY_COMPACT_AFTER.total_seconds()
+        compacted: list[CompletedDispatch] = []
+        for dispatch in self.dispatches:
+            if dispatch.end <= expired:
+                continue
+            prev = compacted[-1] if compacted else None
+            if (
+                prev is not None
+                and dispatch.end <= compact_before
+                and prev.end == dispatch.start
+                and (prev.source, prev.location) == (dispatch.source, dispatch.location)
+            ):
+                compacted[-1] = prev._replace(
+                    end=dispatch.end,
+                    charge_kwh=round(prev.charge_kwh + dispatch.charge_kwh, 3),
+                )
+            else:
+                compacted.append(dispatch)
+        self.dispatches = compacted
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {"dispatches": [list(d) for d in self.dispatches]}
+
+    async def save(self):
+        """Save the history to persistent storage now, instead of after the save delay."""
+        try:
+            await self._store.async_save(self._data_to_save())
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            _LOGGER.error("Error saving completed dispatch history: %s", ex)
+
+    async def remove(self):
+        """Remove the history from persistent storage."""
+        try:
+            await self._store.async_remove()
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            _LOGGER.error("Error removing completed dispatch history: %s", ex)
@@ -0,0 +1,59 @@
+"""Pre-parsed, sorted index of planned dispatch intervals."""
+from datetime import datetime, timezone
+from typing import Any
+
+from .interval import Interval, IntervalSet
+
+
+def parse_dispatch_time(value: str) -> datetime:
+    """Parse a dispatch `startDtUtc`/`endDtUtc` value, e.g. '2024-02-25 02:00:00+00:00'."""
+    return datetime.fromisoformat(value).astimezone(timezone.utc)
+
+
+class DispatchIndex:
+    """Planned dispatch intervals, indexed by dispatch source, built once per update.
+
+    Querying whether a point in time is within a dispatch is a binary search, instead of
+    parsing every dispatch's start and end times on each query.
+    """
+
+    __slots__ = ("_by_source", "_all")
+
+    def __init__(self, planned_dispatches: list[dict[str, Any]] | None):
+        by_source: dict[str, list[Interval]] = {}
+        all_intervals: list[Interval] = []
+        for dispatch in planned_dispatches or []:
+            try:
+                interval = Interval(
+                    parse_dispatch_time(dispatch["startDtUtc"]),
+                    parse_dispatch_time(dispatch["endDtUtc"]),
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+            source = (dispatch.get("meta") or {}).get("source") or ""
+            by_source.setdefault(source, []).append(interval)
+            all_intervals.append(interval)
+        self._by_source = {
+            source: IntervalSet(intervals) for source, intervals in by_source.items()
+        }
+        self._all = IntervalSet(all_intervals)
+
+    def intervals(self, source: str | None = None) -> IntervalSet:
+        """Return the intervals of the given dispatch source, or of all dispatches."""
+        if source is None:
+            return self._all
+        return self._by_source.get(source) or _EMPTY
+
+    def contains(self, when: datetime, source: str | None = None) -> bool:
+        """Return whether `when` is within a dispatch of the given source (or any source)."""
+        return self.intervals(source).contains(when)
+
+    def source_at(self, when: datetime) -> str | None:
+        """Return the source of the dispatch `when` is within, if it's known."""
+        for source, intervals in self._by_source.items():
+            if source and intervals.contains(when):
+                return source
+        return None
+
+
+_EMPTY = IntervalSet()
@@ -0,0 +1,105 @@
+"""Import of the completed dispatches' energy into long-term statistics."""
+import asyncio
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import datetime, timezone
+import logging
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.const import UnitOfEnergy
+from homeassistant.core import HomeAssistant
+from homeassistant.util import slugify
+
+from .const import DOMAIN
+from .dispatch_history import CompletedDispatch, DispatchHistory
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR_SECONDS = 3600
+
+
+def hourly_energy(dispatches: Iterable[CompletedDispatch], from_hour: int | None) -> dict[int, float]:
+    """Return the dispatched kWh per hour (Unix timestamp of the hour's start).
+
+    A dispatch's energy is split over the hours it spans, pro rata. Only hours starting
+    at or after `from_hour` are included.
+    """
+    buckets: dict[int, float] = defaultdict(float)
+    for dispatch in dispatches:
+        duration = dispatch.end - dispatch.start
+        if duration <= 0 or (from_hour is not None and dispatch.end <= from_hour):
+            continue
+        # The API reports the energy charged as a negative delta
+        kwh_per_second = abs(dispatch.charge_kwh) / duration
+        hour = dispatch.start - dispatch.start % HOUR_SECONDS
+        while hour < dispatch.end:
+            overlap = min(dispatch.end, hour + HOUR_SECONDS) - max(dispatch.start, hour)
+            if from_hour is None or hour >= from_hour:
+                buckets[hour] += overlap * kwh_per_second
+            hour += HOUR_SECONDS
+    return buckets
+
+
+class DispatchStatistics:
+    """Imports the energy of completed dispatches into hourly long-term statistics.
+
+    There is one statistic per dispatch source (e.g. smart-charge and bump-charge), e.g.
+    `octopus_intelligent:a_12345678_smart_charge_energy`. Each import continues from the
+    last hour already imported, which is recomputed, as a dispatch that completed later
+    may fall in the same hour.
+    """
+
+    def __init__(self, hass: HomeAssistant, account_id: str, dispatch_history: DispatchHistory):
+        self._hass = hass
+        self._account_id = account_id
+        self._dispatch_history = dispatch_history
+        self._lock = asyncio.Lock()
+
+    def statistic_id(self, source: str | None) -> str:
+        return f"{DOMAIN}:{slugify(self._account_id)}_{slugify(source or 'unknown')}_energy"
+
+    async def async_import(self):
+        """Import the dispatches completed since the last import."""
+        async with self._lock:
+            by_source: dict[str | None, list[CompletedDispatch]] = defaultdict(list)
+            for dispatch in self._dispatch_history.dispatches:
+                by_source[dispatch.source].append(dispatch)
+            for source, dispatches in by_source.items():
+                try:
+                    await self._async_import_source(source, dispatches)
+                except Exception as ex:  # pylint: disable=broad-exception-caught
+                    _LOGGER.error("Error importing %s dispatch statistics: %s", source, ex)
+
+    async def _async_import_source(self, source: str | None, dispatches: list[CompletedDispatch]):
+        statistic_id = self.statistic_id(source)
+        last_stats = await get_instance(self._hass).async_add_executor_job(
+            get_last_statistics, self._hass, 2, statistic_id, True, {"sum"}
+        )
+        rows = last_stats.get(statistic_id, [])
+        from_hour = int(rows[0]["start"]) if rows else None
+        total = (rows[1]["sum"] or 0.0) if len(rows) > 1 else 0.0
+
+        buckets = hourly_energy(dispatches, from_hour)
+        if not buckets:
+            return
+        statistics: list[StatisticData] = []
+        for hour in sorted(buckets):
+            total += buckets[hour]
+            statistics.append(
+                StatisticData(start=datetime.fromtimestamp(hour, timezone.utc), sum=round(total, 3))
+            )
+        metadata = StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            name=f"Octopus Intelligent {source or 'unknown'} energy",
+            source=DOMAIN,
+            statistic_id=statistic_id,
+            unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        )
+        _LOGGER.debug("Importing %s hours of %s statistics", len(statistics), statistic_id)
+        async_add_external_statistics(self._hass, metadata, statistics)
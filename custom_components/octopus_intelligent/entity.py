@@ -0,0 +1,70 @@
+"""Base entity for Octopus Intelligent."""
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+_UNWRITTEN = object()
+
+
+class OctopusIntelligentEntity(CoordinatorEntity):
+    """Entity of the Octopus Intelligent Tariff device, updated by OctopusIntelligentSystem.
+
+    Updates should call `async_write_ha_state_if_changed()`, which skips the write (and so
+    the state_changed event and recorder row) if the state and attributes are unchanged.
+    """
+
+    def __init__(self, octopus_system) -> None:
+        super().__init__(octopus_system)
+        self._octopus_system = octopus_system
+        self._last_written: Any = _UNWRITTEN
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        self.async_write_ha_state_if_changed()
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the state attributes of the entity."""
+        return self._with_stale_data_attributes(None)
+
+    def _with_stale_data_attributes(self, attributes: dict[str, Any] | None) -> dict[str, Any] | None:
+        """Return the attributes, flagged as stale while the data is cached from before a restart."""
+        stale_data_attributes = self._octopus_system.stale_data_attributes
+        if not stale_data_attributes:
+            return attributes
+        return {**(attributes or {}), **stale_data_attributes}
+
+    def _written_state(self) -> tuple:
+        attributes = self.extra_state_attributes
+        return (
+            self.available,
+            self.state,
+            dict(attributes) if attributes is not None else None,
+        )
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        """Write the state to the state machine."""
+        self._last_written = self._written_state()
+        self._octopus_system.write_stats["emitted"] += 1
+        super().async_write_ha_state()
+
+    @callback
+    def async_write_ha_state_if_changed(self) -> None:
+        """Write the state to the state machine, unless it's the same as the last one written."""
+        if self._written_state() == self._last_written:
+            self._octopus_system.write_stats["suppressed"] += 1
+        else:
+            self.async_write_ha_state()
+
+    @property
+    def device_info(self):
+        return {
+            "identifiers": {
+                ("AccountID", self._octopus_system.account_id),
+            },
+            "name": "Octopus Intelligent Tariff",
+            "manufacturer": "Octopus",
+        }
@@ -0,0 +1,36 @@
+"""Lazy import of the GraphQL stack (gql and graphql-core).
+
+Importing gql and graphql-core takes a noticeable time on small hosts, which would be
+added to Home Assistant's startup if the integration imported them at module level. They
+are imported in an executor on first use instead: call `await async_import_gql()` before
+importing from them in a function; the import is then instant.
+"""
+import asyncio
+import importlib
+
+_MODULES = (
+    "graphql",
+    "gql",
+    "gql.transport.aiohttp",
+    "gql.transport.exceptions",
+)
+
+_imported = False
+
+
+def _import_modules():
+    for module in _MODULES:
+        importlib.import_module(module)
+
+
+async def async_import_gql():
+    """Import the GraphQL stack, in an executor, unless it's already imported."""
+    global _imported  # pylint: disable=global-statement
+    if not _imported:
+        await asyncio.get_running_loop().run_in_executor(None, _import_modules)
+        _imported = True
+
+
+def gql_imported() -> bool:
+    """Return whether the GraphQL stack was imported, e.g. so its errors can be raised."""
+    return _imported
@@ -1,33 +1,258 @@
+import asyncio
+import functools
 import logging
 import math
+from typing import TYPE_CHECKING, Any
 
-from gql import Client, gql
-from gql.transport.aiohttp import AIOHTTPTransport
+import aiohttp
+
+from .gql_import import async_import_gql
+from .graphql_schema import async_get_schema, find_schema_drift
+from .graphql_util import RETRY_POLICIES, ErrorClass, classify_error, is_not_found_error
+from .kraken_token import KrakenTokenManager
+
+if TYPE_CHECKING:
+  from gql import Client
+  from gql.transport.aiohttp import AIOHTTPTransport
 
 _LOGGER = logging.getLogger(__name__)
 
+
+# GraphQL documents are parsed on first use only (see `_document()`), instead of
+# on every call. gql is imported lazily (see `gql_import`); it's always imported by the
+# time a document is needed, as the session is connected first.
+_TOKEN_REFRESH_MUTATION = '''
+  mutation krakenTokenRefresh($refreshToken: String!) {
+    obtainKrakenToken(input: { refreshToken: $refreshToken })
+    {
+      token
+      refreshToken
+      refreshExpiresIn
+    }
+  }
+'''
+
+_TOKEN_AUTHENTICATION_MUTATION = '''
+  mutation krakenTokenAuthentication($apiKey: String!) {
+    obtainKrakenToken(input: { APIKey: $apiKey })
+    {
+      token
+      refreshToken
+      refreshExpiresIn
+    }
+  }
+'''
+
+_TRIGGER_BOOST_CHARGE_MUTATION = '''
+  mutation triggerBoostCharge($accountNumber: String!) {
+    triggerBoostCharge(input: { accountNumber: $accountNumber }) {
+      krakenflexDevice {
+        krakenflexDeviceId
+      }
+    }
+  }
+'''
+
+_DELETE_BOOST_CHARGE_MUTATION = '''
+  mutation deleteBoostCharge($accountNumber: String!) {
+    deleteBoostCharge(input: { accountNumber: $accountNumber }) {
+      krakenflexDevice {
+        krakenflexDeviceId
+      }
+    }
+  }
+'''
+
+_VIEWER_QUERY = '''
+  query viewer {
+    viewer {
+      fullName
+      accounts {
+        number
+      }
+    }
+  }
+'''
+
+_CHARGE_PREFERENCES_QUERY = '''
+  query vehicleChargingPreferences($accountNumber: String!) {
+    vehicleChargingPreferences(accountNumber: $accountNumber) {
+      weekdayTargetTime,
+      weekdayTargetSoc,
+      weekendTargetTime,
+      weekendTargetSoc
+    }
+  }
+'''
+
+_DEVICE_INFO_QUERY = '''
+  query registeredKrakenflexDevice($accountNumber: String!) {
+    registeredKrakenflexDevice(accountNumber: $accountNumber) {
+      krakenflexDeviceId
+      provider
+      vehicleMake
+      vehicleModel
+      vehicleBatterySizeInKwh
+      chargePointMake
+      chargePointModel
+      chargePointPowerInKw
+      status
+      suspended
+      hasToken
+      createdAt
+    }
+  }
+'''
+
+_COMBINED_STATE_QUERY = '''
+  query getCombinedData($accountNumber: String!) {
+    vehicleChargingPreferences(accountNumber: $accountNumber) {
+      weekdayTargetTime,
+      weekdayTargetSoc,
+      weekendTargetTime,
+      weekendTargetSoc
+    }
+    registeredKrakenflexDevice(accountNumber: $accountNumber) {
+      status
+      suspended
+    }
+    plannedDispatches(accountNumber: $accountNumber) {
+      startDtUtc: startDt
+      endDtUtc: endDt
+      chargeKwh: delta
+      meta {
+        source
+        location
+      }
+    }
+    completedDispatches(accountNumber: $accountNumber) {
+      startDtUtc: startDt
+      endDtUtc: endDt
+      chargeKwh: delta
+      meta {
+        source
+        location
+      }
+    }
+    devices(accountNumber: $accountNumber) {
+      id
+      deviceType
+      status { current }
+    }
+  }
+'''
+
+_DEVICES_QUERY = '''
+  query getDevices($accountNumber: String!) {
+    devices(accountNumber: $accountNumber) {
+      id
+      deviceType
+      status { current }
+      __typename
+    }
+  }
+'''
+
+_SET_DEVICE_PREFERENCES_MUTATION = '''
+  mutation setDevicePreferences($deviceId: ID!, $schedules: [SmartFlexChargingScheduleInput!]) {
+    setDevicePreferences(input: {
+      deviceId: $deviceId
+      mode: CHARGE
+      unit: PERCENTAGE
+      schedules: $schedules
+    }) {
+      id
+    }
+  }
+'''
+
+_DAYS_OF_WEEK = ("MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY", "SATURDAY", "SUNDAY")
+
+_SUSPEND_SMART_CONTROL_MUTATION = '''
+  mutation updateDeviceSmartControl($deviceId: ID!) {
+    updateDeviceSmartControl(input: { deviceId: $deviceId, action: SUSPEND }) {
+      id
+    }
+  }
+'''
+
+_UNSUSPEND_SMART_CONTROL_MUTATION = '''
+  mutation updateDeviceSmartControl($deviceId: ID!) {
+    updateDeviceSmartControl(input: { deviceId: $deviceId, action: UNSUSPEND }) {
+      id
+    }
+  }
+'''
+
+
+@functools.cache
+def _document(source: str):
+  """Returns the parsed GraphQL document for the given source, parsing it only once."""
+  from gql import gql  # pylint: disable=import-outside-toplevel
+  return gql(source)
+
+
+class _AuthorizedSession:
+  """Wraps a gql session, sending the Kraken token with every request."""
+
+  def __init__(self, session, token: str):
+    self._session = session
+    self._extra_args = {"headers": {"Authorization": token}}
+
+  async def execute(self, document, **kwargs):
+    return await self._session.execute(document, extra_args=self._extra_args, **kwargs)
+
+
 class OctopusEnergyGraphQLClient:
 
-  def __init__(self, api_key: str):
+  def __init__(self, api_key: str, http_session: aiohttp.ClientSession | None = None):
+    """Create a client for the given API key.
+
+    When `http_session` is given (normally Home Assistant's shared aiohttp session),
+    all requests go through its connector so keep-alive connections are pooled and
+    reused instead of paying a new TCP+TLS handshake for every query.
+    """
     if (api_key == None):
       raise Exception('API KEY is not set')
 
     self._api_key = api_key
     self._base_url = "https://api.octopus.energy/v1/graphql/"
     self._login_attempt = 0
+    self._http_session = http_session
+    self._client = None
     self._session = None
+    # Requests using each session, and the sessions to close once they're unused
+    self._session_users: dict[Any, int] = {}
+    self._retired_sessions: set[Any] = set()
+    self._device_ids: dict[str, str] = {}
+    self._connect_lock = asyncio.Lock()
+    self._inflight: dict[tuple, asyncio.Future] = {}
+    self.token_manager = KrakenTokenManager(api_key, self.__async_obtain_token)
+
+  async def async_close(self):
+    """Closes the long-lived session, if any. The shared connection pool is left open."""
+    self.token_manager.cancel()
+    await self.__async_close_session()
 
   async def async_get_accounts(self) -> list[str]:
     """Gets the accounts for the given API key"""
-    return await self.__async_execute_with_session(self.__async_get_accounts)
+    return await self.__async_execute_shared(("viewer",), self.__async_get_accounts)
 
   async def async_get_combined_state(self, account_id: str):
-    """Gets the state for the given account"""
-    return await self.__async_execute_with_session(lambda session: self.__async_get_combined_state(session, account_id))
+    """Gets the state for the given account.
+
+    Only the frequently changing state is included: dispatches, charging preferences and
+    the device status. Static device metadata comes from `async_get_device_info()`.
+    """
+    return await self.__async_execute_shared(
+      ("getCombinedData", account_id),
+      lambda session: self.__async_get_combined_state(session, account_id))
 
   async def async_get_charge_preferences(self, account_id: str):
     """Gets the charging preferences for the given account"""
-    return await self.__async_execute_with_session(lambda session: self.__async_get_charge_preferences(session, account_id))
+    return await self.__async_execute_shared(
+      ("vehicleChargingPreferences", account_id),
+      lambda session: self.__async_get_charge_preferences(session, account_id))
 
   async def async_set_charge_preferences(self, account_id: str, readyByHoursAfterMidnight: float, targetSocPercent: int):
     """Sets the charging preferences for the given account"""
@@ -56,69 +281,173 @@ class OctopusEnergyGraphQLClient:
 
   async def async_get_device_info(self, account_id: str):
     """Gets the device info for the given account"""
-    return await self.__async_execute_with_session(lambda session: self.__async_get_device_info(session, account_id))
+    return await self.__async_execute_shared(
+      ("registeredKrakenflexDevice", account_id),
+      lambda session: self.__async_get_device_info(session, account_id))
     
 
-  async def __async_get_token(self):
-    """Gets a new token from the API"""
-    transport = AIOHTTPTransport(url=self._base_url)
-
-    # Using `async with` on the client will start a connection on the transport
-    # and provide a `session` variable to execute queries on this connection
-    async with Client(
-      transport=transport,
+  async def async_check_schema_drift(self) -> list[str]:
+    """Downloads the live schema and returns where it no longer matches the bundled snapshot."""
+    await async_import_gql()
+    from gql import Client  # pylint: disable=import-outside-toplevel
+    client = Client(
+      transport=self.__create_transport(),
       fetch_schema_from_transport=True,
-    ) as session:
-
-      # Execute single query
-      query = gql(
-      '''
-        mutation krakenTokenAuthentication($apiKey: String!) {
-          obtainKrakenToken(input: { APIKey: $apiKey })
-          {
-            token
-          }
-        }
-      ''')
-
-      params = {"apiKey": self._api_key}
-
-      result = await session.execute(query, variable_values=params, operation_name="krakenTokenAuthentication")
-      token = result['obtainKrakenToken']['token']
-      return token
-      
-  async def __async_get_session(self, reset = False):
-    """Creates a new session, use with `async with`"""
-    if (reset):
-      self._session = None
-
+    )
+    await client.connect_async(reconnecting=False)
+    try:
+      return find_schema_drift(await async_get_schema(), client.schema)
+    finally:
+      await self.__async_close_client(client)
+
+  def __create_transport(self) -> "AIOHTTPTransport":
+    """Creates a transport, sharing the connection pool of the HTTP session if there is one."""
+    from gql.transport.aiohttp import AIOHTTPTransport  # pylint: disable=import-outside-toplevel
+    client_session_args = None
+    if self._http_session is not None:
+      client_session_args = {
+        "connector": self._http_session.connector,
+        "connector_owner": False,
+      }
+    return AIOHTTPTransport(url=self._base_url, client_session_args=client_session_args)
+
+  async def __async_close_session(self):
+    """Closes the current and retired gql clients and sessions, keeping any shared connector alive."""
+    clients = [session.client for session in self._retired_sessions]
+    if self._client is not None:
+      clients.append(self._client)
+    self._client = None
+    self._session = None
+    self._retired_sessions.clear()
+    for client in clients:
+      await self.__async_close_client(client)
+
+  async def __async_retire_session(self, session):
+    """Stops using the given (broken) session for new requests, closing it once unused.
+
+    Other requests may still be using it; if it's really broken, they fail and retry too.
+    """
+    if session is None or session is not self._session:
+      return  # Already replaced after another request failed
+    self._client = None
+    self._session = None
+    self._retired_sessions.add(session)
+    await self.__async_close_if_unused(session)
+
+  async def __async_release_session(self, session):
+    """Marks the end of a request using the given session."""
+    users = self._session_users[session] - 1
+    if users:
+      self._session_users[session] = users
+    else:
+      del self._session_users[session]
+      await self.__async_close_if_unused(session)
+
+  async def __async_close_if_unused(self, session):
+    if session in self._retired_sessions and session not in self._session_users:
+      self._retired_sessions.discard(session)
+      await self.__async_close_client(session.client)
+
+  async def __async_close_client(self, client: "Client"):
+    """Closes the given gql client."""
+    try:
+      aiohttp_session = client.transport.session
+      await client.close_async()
+      # With connector_owner=False the transport leaves its aiohttp session open,
+      # so detach it explicitly (this does not close the shared connector).
+      if self._http_session is not None and aiohttp_session is not None:
+        await aiohttp_session.close()
+    except Exception as ex:  # pylint: disable=broad-exception-caught
+      _LOGGER.debug("Error closing GraphQL session: %s", ex)
+
+  async def __async_obtain_token(self, api_key: str | None = None, refresh_token: str | None = None):
+    """Obtains a new token from the API, using either the API key or a refresh token"""
+    session = await self.__async_get_connected_session()
+    if refresh_token is not None:
+      query = _document(_TOKEN_REFRESH_MUTATION)
+      params = {"refreshToken": refresh_token}
+      operation_name = "krakenTokenRefresh"
+    else:
+      query = _document(_TOKEN_AUTHENTICATION_MUTATION)
+      params = {"apiKey": api_key}
+      operation_name = "krakenTokenAuthentication"
+
+    result = await session.execute(query, variable_values=params, operation_name=operation_name)
+    return result['obtainKrakenToken']
+
+  async def __async_get_connected_session(self):
+    """Returns the long-lived, unauthenticated gql session, connecting it if needed."""
     if (self._session != None):
       return self._session
 
-    token = await self.__async_get_token()
-    headers = {"Authorization": token}
-    transport = AIOHTTPTransport(url=self._base_url, headers=headers)
-
-    # Using `async with` on the client will start a connection on the transport
-    # and provide a `session` variable to execute queries on this connection
-    session = Client(
-      transport=transport,
-      fetch_schema_from_transport=True,
-    )
-    self._session = session
-    return session
+    async with self._connect_lock:
+      if (self._session != None):
+        return self._session
+
+      await async_import_gql()
+      from gql import Client  # pylint: disable=import-outside-toplevel
+      client = Client(
+        transport=self.__create_transport(),
+        schema=await async_get_schema(),
+      )
+      session = await client.connect_async(reconnecting=False)
+      self._client = client
+      self._session = session
+      return session
+
+  async def __async_execute_shared(self, key: tuple, func):
+    """Executes the given query function, sharing one request between concurrent identical calls.
+
+    `key` identifies the operation and its variables; callers with the same key while a
+    request is in flight get its result instead of sending another request.
+    """
+    task = self._inflight.get(key)
+    if task is None:
+      task = asyncio.ensure_future(self.__async_execute_with_session(func))
+      self._inflight[key] = task
+      task.add_done_callback(lambda t: self.__on_shared_done(key, t))
+    # Shielded, so one caller being cancelled doesn't cancel the request for the others
+    return await asyncio.shield(task)
+
+  def __on_shared_done(self, key: tuple, task: asyncio.Future):
+    if self._inflight.get(key) is task:
+      del self._inflight[key]
+    if not task.cancelled():
+      task.exception()  # Mark as retrieved, in case all callers were cancelled
 
   async def __async_execute_with_session(self, func):
-    """Executes the given function with a session, auto retrying with a new session if it fails."""
-    try:
-      async with await self.__async_get_session() as session:
-        return await func(session)
-    except Exception as e:
+    """Executes the given function with a session, retrying failures as per their `ErrorClass`.
+
+    An expired token is replaced and a broken connection is reconnected before retrying;
+    permanent errors (e.g. invalid arguments) are raised straight away.
+    """
+    retries: dict[ErrorClass, int] = {}
+    while True:
+      session = None
       try:
-        async with await self.__async_get_session(reset = True) as session:
-          return await func(session)
-      except Exception as e:
-        raise e
+        session = await self.__async_get_connected_session()
+        self._session_users[session] = self._session_users.get(session, 0) + 1
+        try:
+          token = await self.token_manager.async_get_token()
+          return await func(_AuthorizedSession(session, token))
+        finally:
+          await self.__async_release_session(session)
+      except Exception as ex:
+        error_class = classify_error(ex)
+        attempt = retries.get(error_class, 0)
+        policy = RETRY_POLICIES[error_class]
+        if attempt >= policy.retries:
+          raise
+        retries[error_class] = attempt + 1
+
+        delay = policy.backoff(attempt)
+        _LOGGER.debug("Retrying Octopus API request in %.1fs after %s error: %s", delay, error_class, ex)
+        if error_class == ErrorClass.AUTH_EXPIRED:
+          self.token_manager.invalidate()
+        elif error_class == ErrorClass.TRANSPORT:
+          await self.__async_retire_session(session)
+        if delay > 0:
+          await asyncio.sleep(delay)
 
   async def __async_set_charge_preferences(self, session, account_id: str, readyByHoursAfterMidnight: float, targetSocPercent: int):
     """Sets the charging preferences for the given account"""
@@ -139,47 +468,19 @@ class OctopusEnergyGraphQLClient:
 
     targetTime = f"{readyByHoursAfterMidnightHours:02}:{readyByHoursAfterMidnightMinutes:02}"
 
-    # Retrieve device id for the account
-    device_id = await self.__async_get_device_id(session, account_id)
-    if device_id is None:
-      raise Exception('Failed to find intelligent device id for account')
-
-    # Build schedules for all days using provided time and percentage
-    days_of_week = ["MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY", "SATURDAY", "SUNDAY"]
-    schedules = ", ".join(list(map(lambda day: f"{{\n  dayOfWeek: {day}\n  time: \"{targetTime}\"\n  max: {targetSocPercent}\n}}", days_of_week)))
-
-    # Execute single query using new mutation
-    query_str = f'''
-      mutation setDevicePreferences($deviceId: ID!) {{
-        setDevicePreferences(input: {{
-          deviceId: $deviceId
-          mode: CHARGE
-          unit: PERCENTAGE
-          schedules: [{schedules}]
-        }}) {{
-          id
-        }}
-      }}
-    '''
-    query = gql(query_str)
-
-    params = {"deviceId": device_id}
-    result = await session.execute(query, variable_values=params, operation_name="setDevicePreferences")
-    return result['setDevicePreferences']
+    # The same schedule for all days
+    schedules = [
+      {"dayOfWeek": day, "time": targetTime, "max": targetSocPercent} for day in _DAYS_OF_WEEK
+    ]
+    query = _document(_SET_DEVICE_PREFERENCES_MUTATION)
+    return await self.__async_execute_device_mutation(
+      session, account_id, query, "setDevicePreferences", {"schedules": schedules}
+    )
     
   async def __async_trigger_boost_charge(self, session, account_id: str):
     """Triggers a boost charge for the given account"""
     # Execute single query
-    query = gql(
-    '''
-      mutation triggerBoostCharge($accountNumber: String!) {
-        triggerBoostCharge(input: { accountNumber: $accountNumber }) {
-          krakenflexDevice {
-            krakenflexDeviceId
-          }
-        }
-      }
-    ''')
+    query = _document(_TRIGGER_BOOST_CHARGE_MUTATION)
 
     params = {"accountNumber": account_id}
     result = await session.execute(query, variable_values=params, operation_name="triggerBoostCharge")
@@ -188,16 +489,7 @@ class OctopusEnergyGraphQLClient:
   async def __async_cancel_boost_charge(self, session, account_id: str):
     """Cancels any boost charge currently in progress for the given account"""
     # Execute single query
-    query = gql(
-    '''
-      mutation deleteBoostCharge($accountNumber: String!) {
-        deleteBoostCharge(input: { accountNumber: $accountNumber }) {
-          krakenflexDevice {
-            krakenflexDeviceId
-          }
-        }
-      }
-    ''')
+    query = _document(_DELETE_BOOST_CHARGE_MUTATION)
 
     params = {"accountNumber": account_id}
     result = await session.execute(query, variable_values=params, operation_name="deleteBoostCharge")
@@ -205,17 +497,7 @@ class OctopusEnergyGraphQLClient:
 
   async def __async_get_accounts(self, session):
     # Execute single query
-    query = gql(
-    '''
-        query viewer {
-          viewer {
-            fullName
-            accounts {
-              number
-            }
-          }
-        }
-    ''')
+    query = _document(_VIEWER_QUERY)
 
     params = {}
     result = await session.execute(query, variable_values=params, operation_name="viewer")
@@ -225,17 +507,7 @@ class OctopusEnergyGraphQLClient:
   async def __async_get_charge_preferences(self, session, account_id: str):
     """Gets the charging preferences for the given account"""
     # Execute single query
-    query = gql(
-    '''
-      query vehicleChargingPreferences($accountNumber: String!) {
-        vehicleChargingPreferences(accountNumber: $accountNumber) {
-          weekdayTargetTime,
-          weekdayTargetSoc,
-          weekendTargetTime,
-          weekendTargetSoc
-        }
-      }
-    ''')
+    query = _document(_CHARGE_PREFERENCES_QUERY)
 
     params = {"accountNumber": account_id}
     result = await session.execute(query, variable_values=params, operation_name="vehicleChargingPreferences")
@@ -244,25 +516,7 @@ class OctopusEnergyGraphQLClient:
   async def __async_get_device_info(self, session, account_id: str):
     """Get the user's device info (e.g. vehicle make, battery size, state etc.)"""
     # Execute single query
-    query = gql(
-    '''
-      query registeredKrakenflexDevice($accountNumber: String!) {
-        registeredKrakenflexDevice(accountNumber: $accountNumber) {
-          krakenflexDeviceId
-          provider
-          vehicleMake
-          vehicleModel
-          vehicleBatterySizeInKwh
-          chargePointMake
-          chargePointModel
-          chargePointPowerInKw
-          status
-          suspended
-          hasToken
-          createdAt
-        }
-      }
-    ''')
+    query = _document(_DEVICE_INFO_QUERY)
 
     params = {"accountNumber": account_id}
     result = await session.execute(query, variable_values=params, operation_name="registeredKrakenflexDevice")
@@ -270,127 +524,78 @@ class OctopusEnergyGraphQLClient:
 
   async def __async_get_combined_state(self, session, account_id: str):
     """Get the user's account state"""
-    query = gql(
-    '''
-        query getCombinedData($accountNumber: String!) {
-            vehicleChargingPreferences(accountNumber: $accountNumber) {
-                weekdayTargetTime,
-                weekdayTargetSoc,
-                weekendTargetTime,
-                weekendTargetSoc
-            }
-            registeredKrakenflexDevice(accountNumber: $accountNumber) {
-                krakenflexDeviceId
-                provider
-                vehicleMake
-                vehicleModel
-                vehicleBatterySizeInKwh
-                chargePointMake
-                chargePointModel
-                chargePointPowerInKw
-                status
-                suspended
-                hasToken
-                createdAt
-            }
-            plannedDispatches(accountNumber: $accountNumber) {
-                startDtUtc: startDt
-                endDtUtc: endDt
-                chargeKwh: delta
-                meta { 
-                    source
-                    location
-                }
-            }
-            completedDispatches(accountNumber: $accountNumber) {
-                startDtUtc: startDt
-                endDtUtc: endDt
-                chargeKwh: delta
-                meta { 
-                    source
-                    location
-                }
-            }
-        }
-    ''')
+    query = _document(_COMBINED_STATE_QUERY)
 
     params = {"accountNumber": account_id}
     result = await session.execute(query, variable_values=params, operation_name="getCombinedData")
+    # Every poll refreshes the cached device id, so user actions don't need to look it up
+    if result is not None and 'devices' in result:
+      self.__update_device_id(account_id, result['devices'])
     return result
 
+  def __update_device_id(self, account_id: str, devices):
+    """Caches the id of the account's live intelligent device, given a `devices` query result."""
+    for device in devices or []:
+      if device is not None and device.get('deviceType') == 'ELECTRIC_VEHICLES' and (device.get('status') or {}).get('current') == 'LIVE':
+        self._device_ids[account_id] = device.get('id')
+        return
+    # No live device (e.g. its status changed), so forget any cached id
+    self._device_ids.pop(account_id, None)
 
   async def __async_get_device_id(self, session, account_id: str):
     """Retrieve the new device id for intelligent device for use with mutations."""
+    if account_id in self._device_ids:
+      return self._device_ids[account_id]
+
     # Prefer new devices query, fallback to krakenflexDeviceId
     try:
-      query = gql(
-      '''
-        query getDevices($accountNumber: String!) {
-          devices(accountNumber: $accountNumber) {
-            id
-            deviceType
-            status { current }
-            __typename
-          }
-        }
-      ''')
+      query = _document(_DEVICES_QUERY)
 
       params = {"accountNumber": account_id}
       result = await session.execute(query, variable_values=params, operation_name="getDevices")
-      devices = result['devices'] if result is not None and 'devices' in result else []
-      for device in devices:
-        if device is not None and device.get('deviceType') == 'ELECTRIC_VEHICLES' and device.get('status', {}).get('current') == 'LIVE':
-          return device.get('id')
+      self.__update_device_id(account_id, result['devices'] if result is not None and 'devices' in result else [])
+      if account_id in self._device_ids:
+        return self._device_ids[account_id]
     except Exception:
       pass
 
     # Fallback to legacy device id if available (may not work with new mutations)
     info = await self.__async_get_device_info(session, account_id)
-    return info['krakenflexDeviceId'] if info is not None and 'krakenflexDeviceId' in info else None
-
-
-
-  async def __async_suspend_smart_charging(self, session, account_id: str):
-    """Suspends smart charging for the given account"""
+    device_id = info['krakenflexDeviceId'] if info is not None and 'krakenflexDeviceId' in info else None
+    if device_id is not None:
+      self._device_ids[account_id] = device_id
+    return device_id
+
+  async def __async_execute_device_mutation(
+    self, session, account_id: str, query, operation_name: str, variables: dict[str, Any] | None = None
+  ):
+    """Executes a mutation taking a `$deviceId` (and `variables`), for the account's intelligent device"""
     # Retrieve device id for the account
     device_id = await self.__async_get_device_id(session, account_id)
     if device_id is None:
       raise Exception('Failed to find intelligent device id for account')
 
-    # Execute single query using new mutation
-    query = gql(
-    '''      
-      mutation updateDeviceSmartControl($deviceId: ID!) {
-        updateDeviceSmartControl(input: { deviceId: $deviceId, action: SUSPEND }) {
-          id
-        }
-      }
-    ''')
+    params = {"deviceId": device_id, **(variables or {})}
+    try:
+      result = await session.execute(query, variable_values=params, operation_name=operation_name)
+    except Exception as ex:
+      if is_not_found_error(ex):
+        # The cached device id is stale, look it up again next time
+        self._device_ids.pop(account_id, None)
+      raise
+    return result[operation_name]
 
-    params = {"deviceId": device_id}
-    result = await session.execute(query, variable_values=params, operation_name="updateDeviceSmartControl")
-    return result['updateDeviceSmartControl']
 
 
-  async def __async_resume_smart_charging(self, session, account_id: str):
-    """Resumes smart charging for the given account"""
-    # Retrieve device id for the account
-    device_id = await self.__async_get_device_id(session, account_id)
-    if device_id is None:
-      raise Exception('Failed to find intelligent device id for account')
+  async def __async_suspend_smart_charging(self, session, account_id: str):
+    """Suspends smart charging for the given account"""
+    query = _document(_SUSPEND_SMART_CONTROL_MUTATION)
+    return await self.__async_execute_device_mutation(session, account_id, query, "updateDeviceSmartControl")
 
-    # Execute single query using new mutation
-    query = gql(
-    '''      
-      mutation updateDeviceSmartControl($deviceId: ID!) {
-        updateDeviceSmartControl(input: { deviceId: $deviceId, action: UNSUSPEND }) {
-          id
-        }
-      }
-    ''')
 
-    params = {"deviceId": device_id}
-    result = await session.execute(query, variable_values=params, operation_name="updateDeviceSmartControl")
-    return result['updateDeviceSmartControl']
+  async def __async_resume_smart_charging(self, session, account_id: str):
+    """Resumes smart charging for the given account"""
+    query = _document(_UNSUSPEND_SMART_CONTROL_MUTATION)
+    return await self.__async_execute_device_mutation(session, account_id, query, "updateDeviceSmartControl")
 
 
@@ -0,0 +1,98 @@
+"""Bundled snapshot of the Octopus Kraken GraphQL schema and schema drift detection."""
+import asyncio
+from pathlib import Path
+from typing import TYPE_CHECKING, Final
+
+from .gql_import import async_import_gql
+
+if TYPE_CHECKING:
+    from graphql import GraphQLSchema
+
+SCHEMA_VERSION: Final = 2
+
+_SCHEMA_PATH: Final = Path(__file__).parent / "schema.graphql"
+
+_schema: "GraphQLSchema | None" = None
+
+
+async def async_get_schema() -> "GraphQLSchema":
+    """Return the bundled schema, reading and building it on first use only."""
+    global _schema  # pylint: disable=global-statement
+    if _schema is None:
+        await async_import_gql()
+        from graphql import build_schema  # pylint: disable=import-outside-toplevel
+
+        loop = asyncio.get_running_loop()
+        sdl = await loop.run_in_executor(None, _SCHEMA_PATH.read_text, "utf-8")
+        _schema = build_schema(sdl)
+    return _schema
+
+
+def find_schema_drift(local: "GraphQLSchema", remote: "GraphQLSchema") -> list[str]:
+    """Return a list of differences where the remote schema no longer supports the local one.
+
+    The bundled schema is only a subset, and its type names are not relied on: types are
+    matched by walking the fields reachable from the root query and mutation types.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from graphql import (
+        GraphQLEnumType,
+        GraphQLInputObjectType,
+        GraphQLInterfaceType,
+        GraphQLObjectType,
+        get_named_type,
+    )
+
+    drift: list[str] = []
+    visited: set[str] = set()
+
+    def compare(local_type, remote_type, path: str):
+        local_type = get_named_type(local_type)
+        remote_type = get_named_type(remote_type)
+        if local_type.name in visited:
+            return
+        visited.add(local_type.name)
+
+        if isinstance(local_type, GraphQLEnumType):
+            if not isinstance(remote_type, GraphQLEnumType):
+                drift.append(f"{path}: no longer an enum")
+                return
+            for value in local_type.values:
+                if value not in remote_type.values:
+                    drift.append(f"{path}: enum value {value} removed")
+        elif isinstance(local_type, GraphQLInputObjectType):
+            if not isinstance(remote_type, GraphQLInputObjectType):
+                drift.append(f"{path}: no longer an input object")
+                return
+            for name, field in local_type.fields.items():
+                if name not in remote_type.fields:
+                    drift.append(f"{path}.{name}: input field removed")
+                else:
+                    compare(field.type, remote_type.fields[name].type, f"{path}.{name}")
+        elif isinstance(local_type, (GraphQLObjectType, GraphQLInterfaceType)):
+            if not isinstance(remote_type, (GraphQLObjectType, GraphQLInterfaceType)):
+                drift.append(f"{path}: no longer an object type")
+                return
+            for name, field in local_type.fields.items():
+                remote_field = remote_type.fields.get(name)
+                if remote_field is None:
+                    drift.append(f"{path}.{name}: field removed")
+                    continue
+                for arg_name, arg in field.args.items():
+                    if arg_name not in remote_field.args:
+                        drift.append(f"{path}.{name}({arg_name}): argument removed")
+                    else:
+                        compare(arg.type, remote_field.args[arg_name].type, f"{path}.{name}({arg_name})")
+                compare(field.type, remote_field.type, f"{path}.{name}")
+
+    for local_root, remote_root in (
+        (local.query_type, remote.query_type),
+        (local.mutation_type, remote.mutation_type),
+    ):
+        if local_root is None:
+            continue
+        if remote_root is None:
+            drift.append(f"{local_root.name}: root type removed")
+            continue
+        compare(local_root, remote_root, local_root.name)
+    return drift
@@ -1,30 +1,168 @@
-"""Validation and parsing for the Octopus GraphQL API."""
+"""Validation, error parsing and retry policies for the Octopus GraphQL API."""
+import asyncio
+import random
 from ast import literal_eval
+from dataclasses import dataclass
+from enum import StrEnum
 from pprint import pformat
+from typing import TYPE_CHECKING, Final
 
-from gql.transport.exceptions import TransportQueryError
+import aiohttp
 
-from .graphql_client import OctopusEnergyGraphQLClient
+from .gql_import import gql_imported
+
+if TYPE_CHECKING:
+    from gql.transport.exceptions import TransportQueryError
+
+    from .graphql_client import OctopusEnergyGraphQLClient
+
+# Kraken error codes, as found in the 'extensions' of GraphQL errors.
+AUTH_EXPIRED_ERROR_CODES: Final = {
+    "KT-CT-1111",  # Unauthorized
+    "KT-CT-1112",  # 'Authorization' header not provided
+    "KT-CT-1124",  # JWT has expired
+}
+RATE_LIMITED_ERROR_CODES: Final = {
+    "KT-CT-1199",  # Too many requests
+}
 
 
 class InvalidAuthError(Exception):
     """Invalid Octopus API key or account number."""
 
 
-async def validate_octopus_account(client: OctopusEnergyGraphQLClient, account_id: str):
-    """Check that the Octopus account_id matches the authenticated API."""
+class ErrorClass(StrEnum):
+    """How a failed Octopus API request should be handled."""
+
+    AUTH_EXPIRED = "auth_expired"
+    TRANSPORT = "transport"
+    RATE_LIMITED = "rate_limited"
+    SERVER = "server"
+    PERMANENT = "permanent"
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Retry budget and exponential backoff (with full jitter) for an ErrorClass."""
+
+    retries: int
+    base_delay: float = 0.0
+    max_delay: float = 0.0
+
+    def backoff(self, attempt: int) -> float:
+        """Return the delay in seconds before retry number `attempt` (starting at 0)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+RETRY_POLICIES: Final = {
+    # A new token fixes it straight away, but only try that once.
+    ErrorClass.AUTH_EXPIRED: RetryPolicy(retries=1),
+    ErrorClass.TRANSPORT: RetryPolicy(retries=3, base_delay=1, max_delay=10),
+    ErrorClass.RATE_LIMITED: RetryPolicy(retries=2, base_delay=5, max_delay=30),
+    ErrorClass.SERVER: RetryPolicy(retries=2, base_delay=2, max_delay=15),
+    # Bad arguments, validation errors etc. fail the same way every time.
+    ErrorClass.PERMANENT: RetryPolicy(retries=0),
+}
+
+
+def is_gql_query_error(error: Exception) -> bool:
+    """Return whether the exception is a GQL query error, i.e. the API returned errors."""
+    if not gql_imported():
+        return False  # Then nothing could have raised one
+    from gql.transport.exceptions import TransportQueryError  # pylint: disable=import-outside-toplevel
+
+    return isinstance(error, TransportQueryError)
+
+
+def is_not_found_error(error: Exception) -> bool:
+    """Return whether the API reported that something (e.g. a device) doesn't exist."""
+    if not is_gql_query_error(error):
+        return False
+    for err in error.errors or []:
+        if not isinstance(err, dict):
+            continue
+        extensions = err.get("extensions") or {}
+        if extensions.get("errorType") == "NOT_FOUND":
+            return True
+        message = str(err.get("message", "")).lower()
+        if "not found" in message or "does not exist" in message:
+            return True
+    return False
+
+
+def get_gql_error_codes(error: "TransportQueryError") -> set[str]:
+    """Return the Kraken 'errorCode' values of a GQL query error."""
+    errors = error.errors
+    if not errors:
+        try:
+            errors = [literal_eval(str(error))]
+        except Exception:  # pylint: disable=broad-except
+            return set()
+    codes = set()
+    for err in errors:
+        exts = err.get("extensions") if isinstance(err, dict) else None
+        if isinstance(exts, dict) and isinstance(exts.get("errorCode"), str):
+            codes.add(exts["errorCode"])
+    return codes
+
+
+def classify_error(error: Exception) -> ErrorClass:
+    """Sort an exception raised by an Octopus API request into an ErrorClass."""
+    if gql_imported():
+        error_class = _classify_gql_error(error)
+        if error_class is not None:
+            return error_class
+    if isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError)):
+        return ErrorClass.TRANSPORT
+    return ErrorClass.PERMANENT
+
+
+def _classify_gql_error(error: Exception) -> ErrorClass | None:
+    # pylint: disable-next=import-outside-toplevel
+    from gql.transport.exceptions import (
+        TransportClosed,
+        TransportProtocolError,
+        TransportQueryError,
+        TransportServerError,
+    )
+
+    if isinstance(error, TransportQueryError):
+        codes = get_gql_error_codes(error)
+        if codes & AUTH_EXPIRED_ERROR_CODES:
+            return ErrorClass.AUTH_EXPIRED
+        if codes & RATE_LIMITED_ERROR_CODES:
+            return ErrorClass.RATE_LIMITED
+        return ErrorClass.PERMANENT
+    if isinstance(error, TransportServerError):
+        if error.code == 401:
+            return ErrorClass.AUTH_EXPIRED
+        if error.code == 429:
+            return ErrorClass.RATE_LIMITED
+        if error.code is None or error.code >= 500:
+            return ErrorClass.SERVER
+        return ErrorClass.PERMANENT
+    if isinstance(error, (TransportClosed, TransportProtocolError)):
+        return ErrorClass.TRANSPORT
+    return None
+
+
+async def validate_octopus_account(client: "OctopusEnergyGraphQLClient", account_id: str) -> list[str]:
+    """Check that the Octopus account_id matches the authenticated API; returns its accounts."""
     try:
         accounts = await client.async_get_accounts()
-    except TransportQueryError as ex:
+    except Exception as ex:
+        if not is_gql_query_error(ex):
+            raise
         msg = parse_gql_query_error(ex, "Authentication failed")
         raise InvalidAuthError(msg) from ex
     if account_id not in accounts:
         raise InvalidAuthError(
             f"Account '{account_id}' not found in accounts {accounts}"
         )
+    return accounts
 
 
-def parse_gql_query_error(error: TransportQueryError, default_title: str) -> str:
+def parse_gql_query_error(error: "TransportQueryError", default_title: str) -> str:
     """Format a GQL JSON-like error response into something arguably readable for logging.
 
     Sample formatted return value:
@@ -0,0 +1,139 @@
+"""Immutable time intervals and sets of merged intervals."""
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+
+class Interval(NamedTuple):
+    """A time interval; both the start and end are included."""
+
+    start: datetime
+    end: datetime
+
+    @property
+    def duration(self) -> timedelta:
+        """Return the length of the interval."""
+        return self.end - self.start
+
+    def contains(self, when: datetime) -> bool:
+        """Return whether `when` is within the interval."""
+        return self.start <= when <= self.end
+
+
+class IntervalSet:
+    """Immutable set of sorted, merged (non-overlapping and non-touching) intervals.
+
+    Intervals that overlap or touch are merged on construction. Lookups are binary
+    searches, and the set operations are a single merge pass over both (sorted) sets.
+    """
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, intervals: Iterable[tuple[datetime, datetime]] = ()):
+        starts: list[datetime] = []
+        ends: list[datetime] = []
+        for start, end in sorted(intervals):
+            if ends and start <= ends[-1]:
+                if end > ends[-1]:
+                    ends[-1] = end
+            else:
+                starts.append(start)
+                ends.append(end)
+        self.starts: tuple[datetime, ...] = tuple(starts)
+        self.ends: tuple[datetime, ...] = tuple(ends)
+
+    @classmethod
+    def _from_merged(cls, starts: list[datetime], ends: list[datetime]) -> "IntervalSet":
+        interval_set = cls.__new__(cls)
+        interval_set.starts = tuple(starts)
+        interval_set.ends = tuple(ends)
+        return interval_set
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self) -> Iterator[Interval]:
+        return map(Interval, self.starts, self.ends)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, IntervalSet):
+            return NotImplemented
+        return self.starts == other.starts and self.ends == other.ends
+
+    def __hash__(self) -> int:
+        return hash((self.starts, self.ends))
+
+    def __repr__(self) -> str:
+        return f"IntervalSet({list(self)!r})"
+
+    def contains(self, when: datetime) -> bool:
+        """Return whether `when` is within an interval (start and end inclusive)."""
+        i = bisect_right(self.starts, when) - 1
+        return i >= 0 and when <= self.ends[i]
+
+    def contains_interval(self, start: datetime, end: datetime) -> bool:
+        """Return whether the whole of [start, end] is within a single interval."""
+        i = bisect_right(self.starts, start) - 1
+        return i >= 0 and end <= self.ends[i]
+
+    def interval_from(self, when: datetime) -> Interval | None:
+        """Return the interval containing `when`, or else the next one after it, if any."""
+        i = bisect_left(self.ends, when)
+        return Interval(self.starts[i], self.ends[i]) if i < len(self.ends) else None
+
+    def total_duration(self) -> timedelta:
+        """Return the total length of the intervals."""
+        return sum((end - start for start, end in zip(self.starts, self.ends)), timedelta())
+
+    def union(self, other: "IntervalSet") -> "IntervalSet":
+        """Return the intervals covered by either set."""
+        return IntervalSet((*self, *other))
+
+    def intersection(self, other: "IntervalSet") -> "IntervalSet":
+        """Return the intervals covered by both sets."""
+        starts: list[datetime] = []
+        ends: list[datetime] = []
+        i = j = 0
+        while i < len(self.starts) and j < len(other.starts):
+            start = max(self.starts[i], other.starts[j])
+            end = min(self.ends[i], other.ends[j])
+            if start <= end:
+                starts.append(start)
+                ends.append(end)
+            if self.ends[i] < other.ends[j]:
+                i += 1
+            else:
+                j += 1
+        return IntervalSet._from_merged(starts, ends)
+
+    def difference(self, other: "IntervalSet") -> "IntervalSet":
+        """Return the intervals covered by this set but not by `other`.
+
+        The result's intervals keep the boundaries shared with `other`, as intervals
+        include their start and end.
+        """
+        starts: list[datetime] = []
+        ends: list[datetime] = []
+        j = 0
+        for start, end in zip(self.starts, self.ends):
+            # Skip the intervals of `other` that end before this one starts
+            while j < len(other.starts) and other.ends[j] < start:
+                j += 1
+            k = j
+            while k < len(other.starts) and other.starts[k] <= end:
+                # A single instant removes nothing, as the boundaries are kept
+                if other.starts[k] < other.ends[k]:
+                    if other.starts[k] > start:
+                        starts.append(start)
+                        ends.append(other.starts[k])
+                    start = max(start, other.ends[k])
+                k += 1
+            if start < end or k == j:
+                starts.append(start)
+                ends.append(end)
+        return IntervalSet._from_merged(starts, ends)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
@@ -0,0 +1,192 @@
+"""Kraken token cache with expiry-aware, proactive refresh."""
+import asyncio
+import base64
+import json
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# Refresh this many seconds before the token expires, both proactively in the
+# background and when a token is requested.
+TOKEN_REFRESH_MARGIN_SECONDS = 300
+
+# Kraken tokens are valid for an hour; used when a token's expiry cannot be decoded.
+DEFAULT_TOKEN_LIFETIME_SECONDS = 3600
+
+
+def decode_jwt_expiry(token: str) -> float | None:
+    """Return the `exp` claim (Unix timestamp) of a JWT, without verifying its signature."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp is not None else None
+    except Exception:  # pylint: disable=broad-except
+        return None
+
+
+class KrakenTokenManager:
+    """Caches the Kraken JWT and refreshes it ahead of its expiry.
+
+    `obtain_token` is called with either `api_key=...` or `refresh_token=...` and must
+    return the `obtainKrakenToken` result, i.e. a dict with `token`, `refreshToken`
+    and `refreshExpiresIn` keys. The refresh token is used when still valid, so that
+    the API key only needs to be sent once per refresh token lifetime.
+    """
+
+    def __init__(self, api_key: str, obtain_token: Callable[..., Awaitable[dict[str, Any]]]):
+        self._api_key = api_key
+        self._obtain_token = obtain_token
+        self._token: str | None = None
+        self._expires_at = 0.0
+        self._obtained_at = 0.0
+        self._refresh_token: str | None = None
+        self._refresh_expires_at = 0.0
+        self._refresh_count = 0
+        self._refresh_handle: asyncio.TimerHandle | None = None
+        self._refresh_task: asyncio.Task | None = None
+        # Only one token request at a time; concurrent callers wait for its result.
+        self._lock = asyncio.Lock()
+        self._listeners: list[Callable[[], None]] = []
+
+    @property
+    def token_age(self) -> float | None:
+        """Return the age of the current token in seconds, if there is one."""
+        return time.time() - self._obtained_at if self._token else None
+
+    @property
+    def refresh_count(self) -> int:
+        """Return how many tokens were obtained since startup."""
+        return self._refresh_count
+
+    @property
+    def diagnostics(self) -> dict[str, Any]:
+        """Return token state for diagnostics, without the token itself."""
+        now = time.time()
+        return {
+            "has_token": self._token is not None,
+            "token_age": self.token_age,
+            "token_expires_in": self._expires_at - now if self._token else None,
+            "has_refresh_token": self._refresh_token is not None,
+            "refresh_token_expires_in": (
+                self._refresh_expires_at - now if self._refresh_token else None
+            ),
+            "refresh_count": self._refresh_count,
+        }
+
+    def add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call `listener` whenever a new token is obtained; returns a remove function."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the token state in a JSON-serialisable form for persistence."""
+        return {
+            "token": self._token,
+            "refresh_token": self._refresh_token,
+            "refresh_expires_at": self._refresh_expires_at,
+            "obtained_at": self._obtained_at,
+        }
+
+    def restore(self, data: dict[str, Any]):
+        """Restore the token state saved by `as_dict()`, e.g. after a restart."""
+        token = data.get("token")
+        if token and not self._token:
+            self._set_token(
+                token,
+                data.get("refresh_token"),
+                data.get("refresh_expires_at"),
+                data.get("obtained_at"),
+            )
+            self._schedule_refresh()
+
+    def invalidate(self):
+        """Forget the current token, e.g. after the API rejected it."""
+        self._token = None
+        self._expires_at = 0.0
+
+    def cancel(self):
+        """Cancel the proactive background refresh, including one already running."""
+        self._cancel_timer()
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    def _cancel_timer(self):
+        if self._refresh_handle:
+            self._refresh_handle.cancel()
+            self._refresh_handle = None
+
+    def _needs_refresh(self) -> bool:
+        return self._token is None or time.time() >= self._expires_at - TOKEN_REFRESH_MARGIN_SECONDS
+
+    async def async_get_token(self) -> str:
+        """Return a valid token, obtaining a new one if it's missing or about to expire."""
+        if self._needs_refresh():
+            async with self._lock:
+                if self._needs_refresh():
+                    await self._async_refresh()
+        return self._token
+
+    async def async_refresh(self):
+        """Obtain a new token, using the refresh token if it's still valid."""
+        async with self._lock:
+            await self._async_refresh()
+
+    async def _async_refresh(self):
+        result = None
+        if self._refresh_token and time.time() < self._refresh_expires_at - TOKEN_REFRESH_MARGIN_SECONDS:
+            try:
+                result = await self._obtain_token(refresh_token=self._refresh_token)
+            except Exception as ex:  # pylint: disable=broad-except
+                _LOGGER.debug("Kraken refresh token rejected, using the API key: %s", ex)
+                self._refresh_token = None
+        if result is None:
+            result = await self._obtain_token(api_key=self._api_key)
+
+        self._set_token(
+            result["token"],
+            result.get("refreshToken"),
+            result.get("refreshExpiresIn"),
+            time.time(),
+        )
+        self._refresh_count += 1
+        self._schedule_refresh()
+        for listener in self._listeners:
+            listener()
+
+    def _set_token(self, token, refresh_token, refresh_expires_at, obtained_at):
+        self._token = token
+        self._obtained_at = obtained_at or time.time()
+        self._expires_at = decode_jwt_expiry(token) or (
+            self._obtained_at + DEFAULT_TOKEN_LIFETIME_SECONDS
+        )
+        self._refresh_token = refresh_token or None
+        self._refresh_expires_at = float(refresh_expires_at or 0)
+
+    def _schedule_refresh(self):
+        # Not cancelling the refresh task, as this may be called by it
+        self._cancel_timer()
+        loop = asyncio.get_running_loop()
+        delay = max(0.0, self._expires_at - TOKEN_REFRESH_MARGIN_SECONDS - time.time())
+        self._refresh_handle = loop.call_later(delay, self._start_background_refresh)
+
+    def _start_background_refresh(self):
+        self._refresh_handle = None
+        self._refresh_task = asyncio.get_running_loop().create_task(self._async_background_refresh())
+
+    async def _async_background_refresh(self):
+        try:
+            async with self._lock:
+                # Skip if a token was obtained (and a new refresh scheduled) meanwhile
+                if self._refresh_handle is None:
+                    await self._async_refresh()
+        except Exception as ex:  # pylint: disable=broad-except
+            # The next request will try again, synchronously.
+            _LOGGER.debug("Proactive Kraken token refresh failed: %s", ex)
+        finally:
+            if self._refresh_task is asyncio.current_task():
+                self._refresh_task = None
@@ -0,0 +1,138 @@
+"""Serialized execution of an account's mutations."""
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass, field
+import logging
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class _QueuedMutation:
+    key: str
+    intent: Hashable
+    mutation: Callable[[], Awaitable[Any]]
+    queued_at: float  # time.monotonic() of the first request collapsed into this one
+    futures: list[asyncio.Future] = field(default_factory=list)
+
+
+class MutationQueue:
+    """Runs an account's mutations one at a time, in the order they were requested.
+
+    Each mutation has a `key` (what it changes, e.g. "boost_charge") and an `intent`
+    (the value it sets, e.g. True). A mutation requested while another one with the same
+    key is still waiting replaces it, so a switch flipped on, off and on again while a
+    mutation is running only sends the last one; if that's also the intent of the running
+    mutation, nothing more is sent. The callers of a replaced mutation get the outcome of
+    the mutation that replaced it.
+    """
+
+    def __init__(self, hass: HomeAssistant, name: str):
+        self._hass = hass
+        self._name = name
+        # Waiting mutations by key, in the order they'll run
+        self._pending: dict[str, _QueuedMutation] = {}
+        self._running: _QueuedMutation | None = None
+        self._worker: asyncio.Task | None = None
+        self._stats = {
+            "requested": 0,
+            "executed": 0,
+            "collapsed": 0,
+            "failed": 0,
+            "max_depth": 0,
+            "latency_ms_last": None,
+            "latency_ms_max": None,
+            "latency_ms_total": 0.0,
+        }
+
+    @property
+    def depth(self) -> int:
+        """Return the number of mutations waiting or running."""
+        return len(self._pending) + (self._running is not None)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return the queue statistics, for the diagnostics."""
+        stats = {key: value for key, value in self._stats.items() if key != "latency_ms_total"}
+        stats["depth"] = self.depth
+        stats["latency_ms_avg"] = (
+            round(self._stats["latency_ms_total"] / self._stats["executed"], 1)
+            if self._stats["executed"] else None
+        )
+        return stats
+
+    async def async_run(self, key: str, intent: Hashable, mutation: Callable[[], Awaitable[Any]]) -> Any:
+        """Queue a mutation and return its result (or that of the one replacing it)."""
+        future = self._hass.loop.create_future()
+        self._stats["requested"] += 1
+        queued_at = time.monotonic()
+        replaced = self._pending.pop(key, None)
+        if replaced is not None:
+            self._stats["collapsed"] += 1
+            queued_at = replaced.queued_at
+        running = self._running
+        if running is not None and running.key == key and running.intent == intent:
+            # The running mutation already does this, e.g. on -> (off -> on)
+            _LOGGER.debug("%s: %s %s is already running", self._name, key, intent)
+            # Resume the callers in the order of their requests, this one last
+            if replaced is not None:
+                running.futures.extend(replaced.futures)
+            running.futures.append(future)
+        else:
+            queued = _QueuedMutation(key, intent, mutation, queued_at, [future])
+            if replaced is not None:
+                queued.futures[:0] = replaced.futures
+            self._pending[key] = queued
+            self._stats["max_depth"] = max(self._stats["max_depth"], self.depth)
+            if self._worker is None:
+                self._worker = self._hass.async_create_background_task(
+                    self._async_process(), f"{self._name} mutation queue"
+                )
+        return await future
+
+    async def _async_process(self):
+        try:
+            while self._pending:
+                key = next(iter(self._pending))
+                self._running = self._pending.pop(key)
+                await self._async_execute(self._running)
+                self._running = None
+        finally:
+            # If the worker was cancelled, don't leave the callers waiting forever
+            for queued in (self._running, *self._pending.values()):
+                for future in queued.futures if queued is not None else ():
+                    if not future.done():
+                        future.cancel()
+            self._pending.clear()
+            self._running = None
+            self._worker = None
+
+    async def _async_execute(self, queued: _QueuedMutation):
+        _LOGGER.debug("%s: running %s %s", self._name, queued.key, queued.intent)
+        result = error = None
+        try:
+            result = await queued.mutation()
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            self._stats["failed"] += 1
+            error = ex
+        latency_ms = round((time.monotonic() - queued.queued_at) * 1000, 1)
+        self._stats["executed"] += 1
+        self._stats["latency_ms_last"] = latency_ms
+        self._stats["latency_ms_max"] = max(self._stats["latency_ms_max"] or 0.0, latency_ms)
+        self._stats["latency_ms_total"] += latency_ms
+        for future in queued.futures:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    async def async_drain(self):
+        """Wait until all the queued mutations have run."""
+        if self._worker is not None:
+            await asyncio.shield(self._worker)
@@ -1,43 +1,176 @@
 """Support for Octopus Intelligent Tariff in the UK."""
+from collections.abc import Awaitable, Callable
 from datetime import timedelta, datetime, timezone
+from dataclasses import dataclass
 from typing import Any
 import asyncio
+import hashlib
+import json
 import logging
+import time
 
 import homeassistant.util.dt as dt_util
 
+from homeassistant.core import callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
 
+from .const import (
+    DOMAIN,
+    CONF_OFFPEAK_HORIZON_DAYS_DEFAULT,
+    CONF_POLL_INTERVAL_MIN_DEFAULT,
+    CONF_POLL_INTERVAL_MAX_DEFAULT,
+    PLAN_DEADLINE_MAX_DAYS,
+)
+from .dispatch_history import CompletedDispatch, DispatchHistory
+from .dispatch_statistics import DispatchStatistics
+from .dispatch_index import DispatchIndex
+from .interval import Interval
+from .mutation_queue import MutationQueue
+from .planner import ChargePlan, plan_charge
+from .polling import DEFAULT_INTERVAL, adaptive_update_interval
+from .offpeak_timeline import OffPeakTimeline
+from .state_scheduler import StateChangeScheduler
 from .graphql_client import OctopusEnergyGraphQLClient
-from .graphql_util import validate_octopus_account
+from .graphql_schema import SCHEMA_VERSION
+from .graphql_util import is_not_found_error, validate_octopus_account
 from .persistent_data import PersistentData, PersistentDataStore
 from .util import *
 
 _LOGGER = logging.getLogger(__name__)
 
+SCHEMA_DRIFT_CHECK_INTERVAL = timedelta(days=1)
+
+# Static device metadata (vehicle, charge point etc.) is only fetched this often,
+# or when the device status changes, instead of on every poll.
+DEVICE_INFO_REFRESH_INTERVAL = timedelta(hours=1)
+
+# After a mutation, the data is refreshed this many seconds after the last one, to
+# reconcile the optimistically updated data with the API.
+RECONCILE_DELAY = 10
+
+# Charge preference changes are only written to the API once no other change was made
+# for this many seconds.
+CHARGE_PREFERENCES_WRITE_DELAY = 3
+
+# On restart, the entities are set up from the data cached before it, if it's more recent
+# than this, while the data is refreshed in the background.
+CACHED_DATA_MAX_AGE = timedelta(days=1)
+
+# The duration of the placeholder bump charge dispatch shown until the refresh.
+OPTIMISTIC_BOOST_CHARGE_DURATION = timedelta(hours=1)
+
+
+@dataclass
+class _OptimisticUpdate:
+    key: str  # A later update with the same key supersedes this one
+    description: str
+    patch: Callable[[dict[str, Any]], dict[str, Any]]
+    applied: Callable[[dict[str, Any]], bool]
+    completed_at: float | None = None  # time.monotonic() when the mutation completed
+
+
+def _elapsed_ms(started: float) -> float:
+    """Return the milliseconds elapsed since `started` (a time.monotonic() value)."""
+    return round((time.monotonic() - started) * 1000, 1)
+
+
+def _get_section(data: dict[str, Any], section: str) -> dict[str, Any]:
+    return (data or {}).get(section) or {}
+
+
+def _patch_section(data: dict[str, Any], section: str, **values) -> dict[str, Any]:
+    """Return a copy of the data with the given values of a section replaced."""
+    return {**data, section: {**_get_section(data, section), **values}}
+
+
+def _has_boost_charge_dispatch(data: dict[str, Any]) -> bool:
+    utcnow = dt_util.utcnow()
+    return DispatchIndex(data.get('plannedDispatches')).intervals('bump-charge').interval_from(utcnow) is not None
+
+async def async_remove_persistent_data(hass, account_id: str):
+    """Delete all data stored for the account, when the integration is removed."""
+    await PersistentDataStore(PersistentData(), hass, account_id, lazy_save=False).remove()
+    await DispatchHistory(hass, account_id).remove()
+
+
 class OctopusIntelligentSystem(DataUpdateCoordinator):
-    def __init__(self, hass, *, api_key, account_id, off_peak_start, off_peak_end):
+    def __init__(
+        self,
+        hass,
+        *,
+        api_key,
+        account_id,
+        off_peak_start,
+        off_peak_end,
+        offpeak_horizon_days=CONF_OFFPEAK_HORIZON_DAYS_DEFAULT,
+        schema_drift_check=False,
+        poll_interval_min=timedelta(seconds=CONF_POLL_INTERVAL_MIN_DEFAULT),
+        poll_interval_max=timedelta(seconds=CONF_POLL_INTERVAL_MAX_DEFAULT),
+    ):
         super().__init__(
             hass,
             _LOGGER,
             # Name of the data. For logging purposes.
             name="Octopus Intelligent",
             # Polling interval. Will only be polled if there are subscribers.
-            update_interval=timedelta(seconds=300),
+            # Adapted to the data after each update, see `_update_poll_interval()`.
+            update_interval=DEFAULT_INTERVAL,
         )
+        self._poll_interval_min = poll_interval_min
+        self._poll_interval_max = poll_interval_max
         self._hass = hass
         self._api_key = api_key
         self._account_id = account_id
 
         self._off_peak_start = off_peak_start
         self._off_peak_end = off_peak_end
+        self._offpeak_horizon_days = offpeak_horizon_days
+        self._offpeak_timeline: OffPeakTimeline | None = None
+        self._offpeak_timeline_index: DispatchIndex | None = None
+        self.state_scheduler = StateChangeScheduler(hass, self._state_boundaries)
+        self._optimistic_updates: list[_OptimisticUpdate] = []
+        # time.monotonic() of the data fetches in flight
+        self._fetches_started: list[float] = []
+        self._reconcile_debouncer = Debouncer(
+            hass, _LOGGER, cooldown=RECONCILE_DELAY, immediate=False, function=self.async_refresh
+        )
+        self.mutation_queue = MutationQueue(hass, f"Octopus account {account_id}")
+        self._pending_charge_preferences: tuple[str, int] | None = None
+        self._cancel_charge_preferences_write = None
+        self._schema_drift_check = schema_drift_check
+        self._cancel_schema_drift_check = None
+        self._device_info: dict[str, Any] | None = None
+        # When the data loaded from the cache was fetched, until it's refreshed
+        self._cached_data_updated: datetime | None = None
+        self._device_info_updated: datetime | None = None
+        self.poll_stats = {
+            "polls": 0,
+            "device_info_polls": 0,
+            "payload_bytes_saved_per_poll": 0,
+            "payload_bytes_saved_total": 0,
+            "update_interval": DEFAULT_INTERVAL.total_seconds(),
+        }
+        # How long each phase of the startup took, for the diagnostics
+        self.startup_timings: dict[str, Any] = {}
+        # State writes of the entities, and those skipped as the state was unchanged
+        self.write_stats = {"emitted": 0, "suppressed": 0}
         
-        self.client = OctopusEnergyGraphQLClient(self._api_key)
+        self.client = OctopusEnergyGraphQLClient(
+            self._api_key, async_get_clientsession(hass)
+        )
         self._persistent_data = PersistentData()
         self._store = PersistentDataStore(self._persistent_data, hass, account_id)
+        self.client.token_manager.add_listener(self._on_token_update)
+        self.dispatch_history = DispatchHistory(hass, account_id)
+        self.dispatch_statistics = DispatchStatistics(hass, account_id, self.dispatch_history)
+        self._dispatch_index = DispatchIndex(None)
+        self._dispatch_index_data = None
 
     @property
     def account_id(self):
@@ -81,14 +214,48 @@ class OctopusIntelligentSystem(DataUpdateCoordinator):
                     'weekendTargetTime': '08:00',
                 },
                 'registeredKrakenflexDevice': { ... },
+                'devices': [{
+                    'id': '...',
+                    'deviceType': 'ELECTRIC_VEHICLES',
+                    'status': {'current': 'LIVE'},
+                }],
             }
         """
+        fetch_started = time.monotonic()
+        # The fetch may join the request of one already in flight, see the client, so
+        # its data may be as old as that of the earliest one
+        data_requested = min(self._fetches_started, default=fetch_started)
+        self._fetches_started.append(fetch_started)
         try:
             # Note: asyncio.TimeoutError and aiohttp.ClientError are already
             # handled by the data update coordinator.
             async with asyncio.timeout(90):
-                data = await self.client.async_get_combined_state(self._account_id)
+                if self._device_info_is_stale():
+                    data, device_info = await asyncio.gather(
+                        self.client.async_get_combined_state(self._account_id),
+                        self.client.async_get_device_info(self._account_id),
+                    )
+                    self._set_device_info(device_info)
+                else:
+                    data = await self.client.async_get_combined_state(self._account_id)
+                    self.poll_stats["payload_bytes_saved_total"] += self.poll_stats[
+                        "payload_bytes_saved_per_poll"
+                    ]
+                self.poll_stats["polls"] += 1
+                self._merge_device_info(data)
                 self._update_planned_dispatch_sources(data)
+                if self.dispatch_history.ingest(
+                    data.get("completedDispatches"), self._completed_dispatch_source
+                ):
+                    self._start_dispatch_statistics_import()
+                self._persistent_data.last_data = data
+                self._persistent_data.last_data_updated = dt_util.utcnow().isoformat()
+                data = self._reconcile_optimistic_updates(data, data_requested)
+                self._build_dispatch_index(data)
+                self._update_poll_interval(data)
+                self._cached_data_updated = None
+                if "first_refresh_ms" not in self.startup_timings:
+                    self.startup_timings["first_refresh_ms"] = _elapsed_ms(fetch_started)
                 return data
         # except ApiAuthError as err:
         #     # Raising ConfigEntryAuthFailed will cancel future updates
@@ -96,6 +263,58 @@ class OctopusIntelligentSystem(DataUpdateCoordinator):
         #     raise ConfigEntryAuthFailed from err
         except Exception as err:
             raise UpdateFailed(f"Error communicating with Octopus GraphQL API: {err}")
+        finally:
+            self._fetches_started.remove(fetch_started)
+
+    def _update_poll_interval(self, data: dict[str, Any]):
+        """Adapt the polling interval to the data, before the next poll is scheduled."""
+        dispatch_index = (
+            self._dispatch_index if data is self._dispatch_index_data
+            else DispatchIndex(data.get('plannedDispatches'))
+        )
+        update_interval = adaptive_update_interval(
+            data,
+            dispatch_index,
+            dt_util.utcnow(),
+            self._poll_interval_min,
+            self._poll_interval_max,
+        )
+        if update_interval != self.update_interval:
+            _LOGGER.debug("Polling every %s", update_interval)
+            self.update_interval = update_interval
+            self.poll_stats["update_interval"] = update_interval.total_seconds()
+
+    def _device_info_is_stale(self) -> bool:
+        return (
+            self._device_info_updated is None
+            or dt_util.utcnow() - self._device_info_updated >= DEVICE_INFO_REFRESH_INTERVAL
+        )
+
+    def _set_device_info(self, device_info: dict[str, Any] | None):
+        self._device_info = device_info or {}
+        self._device_info_updated = dt_util.utcnow()
+        self.poll_stats["device_info_polls"] += 1
+        # The size of the static fields, which the regular polls no longer download.
+        static_info = {
+            key: value
+            for key, value in self._device_info.items()
+            if key not in ("status", "suspended")
+        }
+        self.poll_stats["payload_bytes_saved_per_poll"] = len(json.dumps(static_info))
+
+    def _merge_device_info(self, data):
+        """Combine the cached static device metadata with the device status of the poll."""
+        device = (data or {}).get("registeredKrakenflexDevice")
+        if not isinstance(device, dict):
+            return
+        if self._device_info and device.get("status") != self._device_info.get("status"):
+            # The device changed (e.g. re-registered), refresh its metadata on the next poll.
+            self._device_info_updated = None
+        data["registeredKrakenflexDevice"] = {**(self._device_info or {}), **device}
+
+    def invalidate_device_info(self):
+        """Fetch the static device metadata again on the next update."""
+        self._device_info_updated = None
 
     def _update_planned_dispatch_sources(self, data):
         """Workaround for issue #35: missing dispatch sources in Octopus API response."""
@@ -129,12 +348,48 @@ class OctopusIntelligentSystem(DataUpdateCoordinator):
                     if meta:
                         meta["source"] = meta.get("source") or source
 
+    def _completed_dispatch_source(self, dispatch: CompletedDispatch) -> str | None:
+        """Workaround for issue #35, for completed dispatches which usually have no source."""
+        # The source of the planned dispatch it was part of, as of the previous update
+        midpoint = datetime.fromtimestamp((dispatch.start + dispatch.end) / 2, timezone.utc)
+        return (
+            self.dispatch_index.source_at(midpoint)
+            or self._persistent_data.last_seen_planned_dispatch_source
+            or None
+        )
+
+    def _build_dispatch_index(self, data):
+        self._dispatch_index = DispatchIndex((data or {}).get("plannedDispatches"))
+        self._dispatch_index_data = data
+
+    @property
+    def dispatch_index(self) -> DispatchIndex:
+        """Return the index of the planned dispatches in the current data."""
+        if self._dispatch_index_data is not self.data:
+            # The data was set without an update, e.g. by async_set_updated_data()
+            self._build_dispatch_index(self.data)
+        return self._dispatch_index
+
     def is_smart_charging_enabled(self):
         return not self.data.get('registeredKrakenflexDevice', {}).get('suspended', False)
     async def async_suspend_smart_charging(self):
-        await self.client.async_suspend_smart_charging(self._account_id)
+        await self._async_mutate(
+            "smart_charging",
+            False,
+            "suspending smart charging",
+            lambda: self.client.async_suspend_smart_charging(self._account_id),
+            lambda data: _patch_section(data, 'registeredKrakenflexDevice', suspended=True),
+            lambda data: _get_section(data, 'registeredKrakenflexDevice').get('suspended') is True,
+        )
     async def async_resume_smart_charging(self):
-        await self.client.async_resume_smart_charging(self._account_id)
+        await self._async_mutate(
+            "smart_charging",
+            True,
+            "resuming smart charging",
+            lambda: self.client.async_resume_smart_charging(self._account_id),
+            lambda data: _patch_section(data, 'registeredKrakenflexDevice', suspended=False),
+            lambda data: _get_section(data, 'registeredKrakenflexDevice').get('suspended') is False,
+        )
 
     def is_boost_charging_now(self):
         return self.is_charging_now('bump-charge')
@@ -144,63 +399,56 @@ class OctopusIntelligentSystem(DataUpdateCoordinator):
 
     def next_offpeak_start_utc(self, minutes_offset: int = 0):
         offpeak_range = self.next_offpeak_range_utc(minutes_offset=minutes_offset)
-        return offpeak_range["start"] if offpeak_range is not None else None
+        return offpeak_range.start if offpeak_range is not None else None
 
     def next_offpeak_end_utc(self, minutes_offset: int = 0):
         offpeak_range = self.next_offpeak_range_utc(minutes_offset=minutes_offset)
-        return offpeak_range["end"] if offpeak_range is not None else None
+        return offpeak_range.end if offpeak_range is not None else None
 
-    def next_offpeak_range_utc(self, minutes_offset: int = 0):
+    @property
+    def offpeak_timeline(self) -> OffPeakTimeline:
+        """Return the off-peak timeline, rebuilding it if the data, local day or UTC offset changed."""
+        utcnow = dt_util.utcnow()
+        timeline = self._offpeak_timeline
+        if (
+            timeline is None
+            or self._offpeak_timeline_index is not self.dispatch_index
+            or not timeline.is_valid(utcnow)
+        ):
+            index = self.dispatch_index
+            timeline = OffPeakTimeline(
+                utcnow,
+                self._off_peak_start,
+                self._off_peak_end,
+                self._offpeak_horizon_days,
+                index.intervals('smart-charge'),
+            )
+            self._offpeak_timeline = timeline
+            self._offpeak_timeline_index = index
+        return timeline
+
+    def _state_boundaries(self) -> list[datetime]:
+        """Return the instants where off-peak periods or dispatches start or end."""
+        timeline = self.offpeak_timeline
+        boundaries = [timeline.valid_until]
+        for intervals in (timeline.intervals, self.dispatch_index.intervals()):
+            boundaries.extend(intervals.starts)
+            boundaries.extend(intervals.ends)
+        return boundaries
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all registered listeners, and the state change schedule for the new data."""
+        self.state_scheduler.async_reschedule()
+        super().async_update_listeners()
+
+    def next_offpeak_range_utc(self, minutes_offset: int = 0) -> Interval | None:
         utcnow = dt_util.utcnow() + timedelta(minutes=minutes_offset)
-        localdate = dt_util.start_of_local_day(dt_util.as_local(utcnow))
-        fixed_start_b1 = dt_util.as_utc(localdate - timedelta(days=1) + self._off_peak_start)
-        fixed_end_b1 = dt_util.as_utc(localdate - timedelta(days=1) + self._off_peak_end)
-        fixed_start_0 = dt_util.as_utc(localdate + self._off_peak_start)
-        fixed_end_0 = dt_util.as_utc(localdate + self._off_peak_end)
-        fixed_start_a1 = dt_util.as_utc(localdate + timedelta(days=1) + self._off_peak_start)
-        fixed_end_a1 = dt_util.as_utc(localdate + timedelta(days=1) + self._off_peak_end)
-        #fixed_start_a2 = dt_util.as_utc(localdate + timedelta(days=2) + self._off_peak_start)
-        fixed_end_a2 = dt_util.as_utc(localdate + timedelta(days=2) + self._off_peak_end)
-
-        if fixed_start_b1 > fixed_end_b1:
-            all_offpeak_ranges = [
-                {"start": fixed_start_b1, "end": fixed_end_0},
-                {"start": fixed_start_0, "end": fixed_end_a1},
-                {"start": fixed_start_a1, "end": fixed_end_a2}
-            ]
-        else:
-            all_offpeak_ranges = [
-                {"start": fixed_start_b1, "end": fixed_end_b1},
-                {"start": fixed_start_0, "end": fixed_end_0},
-                {"start": fixed_start_a1, "end": fixed_end_a1},
-            ]
-
-        for state in self.data.get('plannedDispatches', []):
-            if state.get('meta', {}).get('source', '') == 'smart-charge':
-                startUtc = datetime.strptime(state.get('startDtUtc'), '%Y-%m-%d %H:%M:%S%z').astimezone(timezone.utc)
-                endUtc = datetime.strptime(state.get('endDtUtc'), '%Y-%m-%d %H:%M:%S%z').astimezone(timezone.utc)
-                all_offpeak_ranges.append({"start": startUtc, "end": endUtc})
-
-        # merge overlapping ones:
-        offpeak_ranges = merge_and_sort_time_ranges(all_offpeak_ranges)
-
-        for offpeak_range in offpeak_ranges:
-            startUtc = offpeak_range["start"]
-            endUtc = offpeak_range["end"]
-            if startUtc <= utcnow <= endUtc or utcnow <= startUtc:
-                return offpeak_range
-        return None
-
+        return self.offpeak_timeline.interval_from(utcnow)
 
     def is_charging_now(self, source = None, minutes_offset: int = 0):
         utcnow = dt_util.utcnow() + timedelta(minutes=minutes_offset)
-        for state in self.data.get('plannedDispatches', []):
-            if source is None or state.get('meta', {}).get('source', '') == source:
-                startUtc = datetime.strptime(state.get('startDtUtc'), '%Y-%m-%d %H:%M:%S%z').astimezone(timezone.utc)
-                endUtc = datetime.strptime(state.get('endDtUtc'), '%Y-%m-%d %H:%M:%S%z').astimezone(timezone.utc)
-                if startUtc <= utcnow <= endUtc:
-                    return True
-        return False
+        return self.dispatch_index.contains(utcnow, source)
 
     def is_off_peak_time_now(self, minutes_offset: int = 0):
         now = dt_util.now() + timedelta(minutes=minutes_offset)
@@ -213,7 +461,53 @@ class OctopusIntelligentSystem(DataUpdateCoordinator):
             return offpeak_start_mins <= now_mins <= offpeak_end_mins
 
     def is_off_peak_now(self, minutes_offset: int = 0):
-        return self.is_off_peak_time_now(minutes_offset) or self.is_charging_now('smart-charge', minutes_offset)
+        utcnow = dt_util.utcnow() + timedelta(minutes=minutes_offset)
+        return self.offpeak_timeline.contains(utcnow)
+
+    def is_off_peak_for(self, minutes: int):
+        """Return whether it's off-peak from now until `minutes` from now, without a gap."""
+        utcnow = dt_util.utcnow()
+        return self.offpeak_timeline.contains_interval(utcnow, utcnow + timedelta(minutes=minutes))
+
+    def _device_value(self, key: str) -> float | None:
+        try:
+            return float(self.data.get('registeredKrakenflexDevice', {}).get(key))
+        except (TypeError, ValueError):
+            return None
+
+    def get_charge_point_power_kw(self) -> float | None:
+        return self._device_value('chargePointPowerInKw')
+
+    def get_vehicle_battery_size_kwh(self) -> float | None:
+        return self._device_value('vehicleBatterySizeInKwh')
+
+    def plan_charge(self, deadline: datetime, required_kwh: float, power_kw: float | None = None) -> ChargePlan:
+        """Plan charging `required_kwh` in the off-peak periods before `deadline`.
+
+        Raises ValueError if the deadline is past or more than PLAN_DEADLINE_MAX_DAYS ahead.
+        """
+        utcnow = dt_util.utcnow()
+        deadline = dt_util.as_utc(deadline)
+        if deadline <= utcnow:
+            raise ValueError("The deadline is in the past")
+        if deadline - utcnow > timedelta(days=PLAN_DEADLINE_MAX_DAYS):
+            raise ValueError(f"The deadline is more than {PLAN_DEADLINE_MAX_DAYS} days ahead")
+        if power_kw is None:
+            power_kw = self.get_charge_point_power_kw()
+        if not power_kw:
+            raise ValueError("The charge point power is unknown, please specify power_kw")
+        timeline = self.offpeak_timeline
+        horizon_days = (dt_util.as_local(deadline).date() - dt_util.as_local(utcnow).date()).days
+        if horizon_days > self._offpeak_horizon_days:
+            # The deadline is beyond the timeline, extend it with the daily off-peak window
+            timeline = OffPeakTimeline(
+                utcnow,
+                self._off_peak_start,
+                self._off_peak_end,
+                horizon_days,
+                self.dispatch_index.intervals('smart-charge'),
+            )
+        return plan_charge(timeline.intervals, utcnow, deadline, required_kwh, power_kw)
 
     def get_target_soc(self):
         return self.data.get('vehicleChargingPreferences', {}).get('weekdayTargetSoc', None)
@@ -225,33 +519,332 @@ class OctopusIntelligentSystem(DataUpdateCoordinator):
         if target_time_str is None:
             _LOGGER.warn("Octopus Intelligent System could not set target SOC because data is not available yet")
             return
-        target_time = to_hours_after_midnight(target_time_str)
-        await self.client.async_set_charge_preferences(self._account_id, target_time, target_soc)
-        await self.async_refresh()
+        await self._async_set_charge_preferences(target_time_str, target_soc)
 
     async def async_set_target_time(self, target_time: str):
         target_soc = self.get_target_soc()
         if (target_soc is None):
             _LOGGER.warn("Octopus Intelligent System could not set target time because data is not available yet")
             return
-        target_time = to_hours_after_midnight(target_time)
-        await self.client.async_set_charge_preferences(self._account_id, target_time, target_soc)
-        await self.async_refresh()
+        await self._async_set_charge_preferences(target_time, target_soc)
+
+    async def _async_set_charge_preferences(self, target_time: str, target_soc: int):
+        """Update the charge preferences, writing them to the API after a quiet period.
+
+        The data and entities are updated right away, but the mutation is delayed until
+        no other change was made for CHARGE_PREFERENCES_WRITE_DELAY, so e.g. scrolling
+        through the select options only sends the last target SoC and time.
+        """
+        self._pending_charge_preferences = (target_time, target_soc)
+        self._async_patch_data(
+            "charge_preferences",
+            f"charge preferences {target_time} {target_soc}%",
+            lambda data: _patch_section(
+                data,
+                'vehicleChargingPreferences',
+                weekdayTargetTime=target_time,
+                weekdayTargetSoc=target_soc,
+                weekendTargetTime=target_time,
+                weekendTargetSoc=target_soc,
+            ),
+            lambda data: (
+                _get_section(data, 'vehicleChargingPreferences').get('weekdayTargetTime'),
+                _get_section(data, 'vehicleChargingPreferences').get('weekdayTargetSoc'),
+            ) == (target_time, target_soc),
+        )
+        if self._cancel_charge_preferences_write:
+            self._cancel_charge_preferences_write()
+        self._cancel_charge_preferences_write = async_call_later(
+            self._hass, CHARGE_PREFERENCES_WRITE_DELAY, self._async_write_charge_preferences
+        )
+
+    async def _async_write_charge_preferences(self, _now=None):
+        """Write the pending charge preferences to the API, if any."""
+        self._cancel_charge_preferences_write = None
+        if self._pending_charge_preferences is None:
+            return
+        target_time, target_soc = self._pending_charge_preferences
+        self._pending_charge_preferences = None
+        update = next(
+            (pending for pending in self._optimistic_updates if pending.key == "charge_preferences"),
+            None,
+        )
+        try:
+            await self.mutation_queue.async_run(
+                "charge_preferences",
+                (target_time, target_soc),
+                lambda: self.client.async_set_charge_preferences(
+                    self._account_id, to_hours_after_midnight(target_time), target_soc
+                ),
+            )
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            _LOGGER.error("Error setting the charge preferences: %s", ex)
+            if is_not_found_error(ex):
+                self.invalidate_device_info()
+            self._async_revert_optimistic_update(update)
+        else:
+            if update is not None:
+                update.completed_at = time.monotonic()
+        await self._reconcile_debouncer.async_call()
 
     async def async_start_boost_charge(self):
-        await self.client.async_trigger_boost_charge(self._account_id)
+        utcnow = dt_util.utcnow().replace(microsecond=0)
+        # Stands in for the bump charge dispatch until the refresh returns the real one
+        dispatch = {
+            'startDtUtc': str(utcnow),
+            'endDtUtc': str(utcnow + OPTIMISTIC_BOOST_CHARGE_DURATION),
+            'meta': {'location': None, 'source': 'bump-charge'},
+        }
+        await self._async_mutate(
+            "boost_charge",
+            True,
+            "starting a bump charge",
+            lambda: self.client.async_trigger_boost_charge(self._account_id),
+            lambda data: {**data, 'plannedDispatches': [*data.get('plannedDispatches', []), dispatch]},
+            _has_boost_charge_dispatch,
+        )
     async def async_cancel_boost_charge(self):
-        await self.client.async_cancel_boost_charge(self._account_id)
+        await self._async_mutate(
+            "boost_charge",
+            False,
+            "cancelling the bump charge",
+            lambda: self.client.async_cancel_boost_charge(self._account_id),
+            lambda data: {
+                **data,
+                'plannedDispatches': [
+                    dispatch for dispatch in data.get('plannedDispatches', [])
+                    if (dispatch.get('meta') or {}).get('source') != 'bump-charge'
+                ],
+            },
+            lambda data: not _has_boost_charge_dispatch(data),
+        )
+
+    async def _async_mutate(
+        self,
+        key: str,
+        intent: Any,
+        description: str,
+        mutation: Callable[[], Awaitable[Any]],
+        patch: Callable[[dict[str, Any]], dict[str, Any]],
+        applied: Callable[[dict[str, Any]], bool],
+    ):
+        """Run a mutation, optimistically updating the data and the entities right away.
+
+        The mutation is run through the mutation queue, under `key` with `intent` (the
+        value it sets), so it may be collapsed with other mutations of the same key.
+
+        `patch` returns a patched copy of the data, as the mutation should change it.
+        Until the mutation completed, the patch is also applied to the data of each refresh.
+        A refresh requested after that, e.g. after RECONCILE_DELAY, replaces the patched data
+        with that of the API; if `applied(data)` then returns False, the API did not apply
+        the change and it's logged. If the mutation fails, its patch is dropped from the
+        data right away (keeping the other pending ones) and a refresh is requested.
+        """
+        update = self._async_patch_data(key, description, patch, applied)
+        try:
+            await self.mutation_queue.async_run(key, intent, mutation)
+        except Exception as ex:
+            if is_not_found_error(ex):
+                # e.g. the device was replaced
+                self.invalidate_device_info()
+            self._async_revert_optimistic_update(update)
+            await self._reconcile_debouncer.async_call()
+            raise
+        if update is not None:
+            update.completed_at = time.monotonic()
+        await self._reconcile_debouncer.async_call()
+
+    @callback
+    def _async_patch_data(
+        self,
+        key: str,
+        description: str,
+        patch: Callable[[dict[str, Any]], dict[str, Any]],
+        applied: Callable[[dict[str, Any]], bool],
+    ) -> _OptimisticUpdate | None:
+        """Optimistically patch the data and update the entities; see `_async_mutate()`."""
+        if self.data is None:
+            return None
+        update = _OptimisticUpdate(key, description, patch, applied)
+        self._optimistic_updates = [
+            pending for pending in self._optimistic_updates if pending.key != key
+        ] + [update]
+        patched = patch(self.data)
+        # e.g. poll fast while a bump charge is starting
+        self._update_poll_interval(patched)
+        self.async_set_updated_data(patched)
+        return update
+
+    @callback
+    def _async_revert_optimistic_update(self, update: _OptimisticUpdate | None):
+        """Drop the patch of a failed mutation from the data, keeping the other patches.
+
+        The data is rebuilt from that last fetched, as other patches may have been applied
+        on top of this one since.
+        """
+        if update not in self._optimistic_updates:
+            return
+        self._optimistic_updates.remove(update)
+        data = self._persistent_data.last_data
+        if not data:
+            return
+        for pending in self._optimistic_updates:
+            data = pending.patch(data)
+        # e.g. poll slowly again if suspending smart charging failed
+        self._update_poll_interval(data)
+        self.async_set_updated_data(data)
+
+    def _reconcile_optimistic_updates(self, data: dict[str, Any], data_requested: float) -> dict[str, Any]:
+        """Check the optimistic updates against the data fetched, and return the data to use.
+
+        An update whose mutation completed before the data was requested should be in
+        the data. The others are still pending, so they're applied to the data.
+        """
+        pending = []
+        for update in self._optimistic_updates:
+            if update.completed_at is None or update.completed_at >= data_requested:
+                pending.append(update)
+                data = update.patch(data)
+            elif not update.applied(data):
+                _LOGGER.warning(
+                    "Octopus API did not apply %s; reverted to the data returned by the API",
+                    update.description,
+                )
+        self._optimistic_updates = pending
+        return data
 
-    async def async_remove_entry(self):
-        """Called when the integration (config entry) is removed from Home Assistant."""
-        await self._store.remove()
+    async def async_unload(self):
+        """Called when the config entry is unloaded (e.g. reloaded or about to be removed)."""
+        await self.stop()
+        # Save now; the instance won't be around for the HASS STOP event.
+        await self._store.save()
+        self._store.lazy_save = False
+        await self.dispatch_history.save()
+
+    @property
+    def _api_key_hash(self) -> str:
+        return hashlib.sha256(self._api_key.encode()).hexdigest()
+
+    def _on_token_update(self):
+        """Keep the latest Kraken token in the persistent data, so restarts can reuse it."""
+        self._persistent_data.kraken_token = {
+            "api_key_hash": self._api_key_hash,
+            **self.client.token_manager.as_dict(),
+        }
+
+    @callback
+    def _start_dispatch_statistics_import(self):
+        self._hass.async_create_background_task(
+            self.dispatch_statistics.async_import(),
+            f"{DOMAIN} {self._account_id} dispatch statistics import",
+        )
+
+    @property
+    def stale_data_attributes(self) -> dict[str, Any]:
+        """Return the attributes flagging the data as cached from before the last restart."""
+        if self._cached_data_updated is None:
+            return {}
+        age = dt_util.utcnow() - self._cached_data_updated
+        return {"stale": True, "data_age": int(age.total_seconds())}
+
+    async def async_load(self) -> bool:
+        """Load the persistent data, before `start()`.
+
+        Returns whether the data cached before the last restart was loaded, in which case
+        the entities can be set up before `start()` and the first refresh.
+        """
+        load_started = time.monotonic()
+        await self._store.load()
+        await self.dispatch_history.load()
+        # Catch up with the dispatches completed before the statistics were imported
+        self._start_dispatch_statistics_import()
+
+        # Reuse the token saved before the last restart, unless the API key has changed.
+        kraken_token = self._persistent_data.kraken_token
+        if kraken_token.get("api_key_hash") == self._api_key_hash:
+            self.client.token_manager.restore(kraken_token)
+
+        self.startup_timings["load_ms"] = _elapsed_ms(load_started)
+        last_data_updated = dt_util.parse_datetime(self._persistent_data.last_data_updated or "")
+        if last_data_updated is None or dt_util.utcnow() - last_data_updated > CACHED_DATA_MAX_AGE:
+            return False
+        _LOGGER.debug("Using the data cached at %s until the first refresh", last_data_updated)
+        self.data = self._persistent_data.last_data
+        self._cached_data_updated = last_data_updated
+        return True
+
+    async def async_start_and_refresh(self):
+        """Start and refresh the data loaded from the cache, in the background.
+
+        The account is validated while the data is fetched; they share the token.
+        """
+        start_result, _ = await asyncio.gather(self.start(), self.async_refresh(), return_exceptions=True)
+        if isinstance(start_result, Exception):
+            _LOGGER.error("Got error when starting Octopus Intelligent: %s", start_result)
 
     async def start(self):
         _LOGGER.debug("Starting OctopusIntelligentSystem")
-        await validate_octopus_account(self.client, self._account_id)
+        validate_started = time.monotonic()
+        await self._async_validate_account()
+        self.startup_timings["validate_account_ms"] = _elapsed_ms(validate_started)
+
+        if self._schema_drift_check:
+            self._start_schema_drift_check()
+            self._cancel_schema_drift_check = async_track_time_interval(
+                self._hass,
+                self._start_schema_drift_check,
+                SCHEMA_DRIFT_CHECK_INTERVAL,
+            )
 
-        await self._store.load()
+    async def _async_validate_account(self):
+        """Check the account belongs to the API key, unless it was already checked for that key."""
+        validated_accounts = self._persistent_data.validated_accounts
+        if (
+            validated_accounts.get("api_key_hash") == self._api_key_hash
+            and self._account_id in validated_accounts.get("account_ids", [])
+        ):
+            self.startup_timings["validate_account_cached"] = True
+            return
+        accounts = await validate_octopus_account(self.client, self._account_id)
+        self._persistent_data.validated_accounts = {
+            "api_key_hash": self._api_key_hash,
+            "account_ids": accounts,
+        }
+        self.startup_timings["validate_account_cached"] = False
+
+    @callback
+    def _start_schema_drift_check(self, _now=None):
+        self._hass.async_create_background_task(
+            self._async_check_schema_drift(), "octopus_intelligent schema drift check"
+        )
+
+    async def _async_check_schema_drift(self):
+        """Compare the bundled GraphQL schema snapshot against the live Octopus API schema."""
+        try:
+            drift = await self.client.async_check_schema_drift()
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            _LOGGER.debug("Could not check the Octopus API schema for changes: %s", ex)
+            return
+        if drift:
+            _LOGGER.warning(
+                "Octopus API schema no longer matches the bundled schema (version %s):\n%s",
+                SCHEMA_VERSION,
+                "\n".join(drift),
+            )
+        else:
+            _LOGGER.debug("Octopus API schema matches the bundled schema (version %s)", SCHEMA_VERSION)
 
     async def stop(self):
         _LOGGER.debug("Stopping OctopusIntelligentSystem")
+        if self._cancel_schema_drift_check:
+            self._cancel_schema_drift_check()
+            self._cancel_schema_drift_check = None
+        self.state_scheduler.async_stop()
+        # Also ignores the reconcile requests of the writes flushed below
+        await self._reconcile_debouncer.async_shutdown()
+        if self._cancel_charge_preferences_write:
+            self._cancel_charge_preferences_write()
+        # Don't lose a change made just before stopping
+        await self._async_write_charge_preferences()
+        await self.mutation_queue.async_drain()
+        await self.client.async_close()
@@ -0,0 +1,59 @@
+"""Precomputed timeline of off-peak periods."""
+from datetime import datetime, timedelta
+
+import homeassistant.util.dt as dt_util
+
+from .interval import Interval, IntervalSet
+
+
+class OffPeakTimeline:
+    """Merged off-peak periods: the fixed daily off-peak window plus smart-charge dispatches.
+
+    The timeline covers the previous local day up to `horizon_days` days ahead and only
+    needs rebuilding when the dispatches change, at local midnight (to move the horizon)
+    or when the UTC offset changes (DST); see `is_valid()`.
+    """
+
+    __slots__ = ("intervals", "valid_until", "utc_offset")
+
+    def __init__(
+        self,
+        utcnow: datetime,
+        off_peak_start: timedelta,
+        off_peak_end: timedelta,
+        horizon_days: int,
+        dispatch_intervals: IntervalSet,
+    ):
+        local_now = dt_util.as_local(utcnow)
+        localdate = dt_util.start_of_local_day(local_now)
+        ranges = list(dispatch_intervals)
+        for day in range(-1, horizon_days + 1):
+            day_start = localdate + timedelta(days=day)
+            start = dt_util.as_utc(day_start + off_peak_start)
+            end = dt_util.as_utc(day_start + off_peak_end)
+            if start > end:
+                # The off-peak window spans midnight
+                end = dt_util.as_utc(day_start + timedelta(days=1) + off_peak_end)
+            ranges.append((start, end))
+        self.intervals = IntervalSet(ranges)
+        self.valid_until = dt_util.as_utc(localdate + timedelta(days=1))
+        self.utc_offset = local_now.utcoffset()
+
+    def is_valid(self, utcnow: datetime) -> bool:
+        """Return whether the timeline is still current (same local day and UTC offset)."""
+        return (
+            utcnow < self.valid_until
+            and dt_util.as_local(utcnow).utcoffset() == self.utc_offset
+        )
+
+    def contains(self, when: datetime) -> bool:
+        """Return whether `when` is off-peak."""
+        return self.intervals.contains(when)
+
+    def contains_interval(self, start: datetime, end: datetime) -> bool:
+        """Return whether the whole of [start, end] is off-peak."""
+        return self.intervals.contains_interval(start, end)
+
+    def interval_from(self, when: datetime) -> Interval | None:
+        """Return the off-peak period containing `when`, or else the next one."""
+        return self.intervals.interval_from(when)
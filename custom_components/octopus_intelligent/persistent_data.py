@@ -1,6 +1,6 @@
 """Persistent data storage for the integration, based on the HASS helpers.storage.Store class."""
 import logging
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, field
 from typing import Any
 
 from homeassistant.const import EVENT_HOMEASSISTANT_STOP
@@ -19,6 +19,12 @@ class PersistentData:
     """JSON-serialisable persistent data."""
 
     last_seen_planned_dispatch_source: str = "smart-charge"
+    kraken_token: dict[str, Any] = field(default_factory=dict)
+    # The last data fetched by the coordinator, to set the entities up quickly on restart
+    last_data: dict[str, Any] = field(default_factory=dict)
+    last_data_updated: str | None = None  # ISO format, UTC
+    # The accounts of the API key (by hash), so they're only validated once per API key
+    validated_accounts: dict[str, Any] = field(default_factory=dict)
 
     def set_values(self, data: dict[str, Any]):
         """Assign values from the given dict to this dataclass."""
@@ -28,6 +34,17 @@ class PersistentData:
             "last_seen_planned_dispatch_source",
             self.last_seen_planned_dispatch_source,
         )
+        kraken_token = data.get("kraken_token")
+        if isinstance(kraken_token, dict):
+            self.kraken_token = kraken_token
+        last_data = data.get("last_data")
+        last_data_updated = data.get("last_data_updated")
+        if isinstance(last_data, dict) and isinstance(last_data_updated, str):
+            self.last_data = last_data
+            self.last_data_updated = last_data_updated
+        validated_accounts = data.get("validated_accounts")
+        if isinstance(validated_accounts, dict):
+            self.validated_accounts = validated_accounts
 
 
 class PersistentDataStore:
@@ -0,0 +1,64 @@
+"""Planning charging into the off-peak periods before a deadline."""
+from datetime import datetime, timedelta
+from typing import Any, NamedTuple
+
+from .interval import Interval, IntervalSet
+
+
+class ChargePlan(NamedTuple):
+    """The off-peak intervals to charge in, and how much energy that provides."""
+
+    intervals: list[Interval]
+    required_kwh: float
+    planned_kwh: float
+    power_kw: float
+
+    @property
+    def shortfall_kwh(self) -> float:
+        """Return the energy that can't be charged off-peak before the deadline."""
+        return max(0.0, round(self.required_kwh - self.planned_kwh, 3))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the plan as service response data."""
+        return {
+            "intervals": [
+                {
+                    "start": interval.start.isoformat(),
+                    "end": interval.end.isoformat(),
+                    "kwh": round(interval.duration.total_seconds() / 3600 * self.power_kw, 3),
+                }
+                for interval in self.intervals
+            ],
+            "required_kwh": round(self.required_kwh, 3),
+            "planned_kwh": round(self.planned_kwh, 3),
+            "shortfall_kwh": self.shortfall_kwh,
+            "power_kw": self.power_kw,
+        }
+
+
+def plan_charge(
+    off_peak: IntervalSet,
+    utcnow: datetime,
+    deadline: datetime,
+    required_kwh: float,
+    power_kw: float,
+) -> ChargePlan:
+    """Plan charging `required_kwh` at `power_kw` in the off-peak periods before `deadline`.
+
+    All off-peak periods (including smart charge dispatches) have the same rate, so the
+    earliest ones are used, which leaves the most margin if the plan changes. The last
+    interval is shortened to what's needed.
+    """
+    remaining = timedelta(hours=required_kwh / power_kw) if power_kw > 0 else timedelta(0)
+    intervals: list[Interval] = []
+    for interval in off_peak & IntervalSet([(utcnow, deadline)]):
+        if remaining <= timedelta(0):
+            break
+        if interval.duration <= timedelta(0):
+            continue
+        if interval.duration > remaining:
+            interval = Interval(interval.start, interval.start + remaining)
+        intervals.append(interval)
+        remaining -= interval.duration
+    planned_hours = sum((interval.duration for interval in intervals), timedelta()).total_seconds() / 3600
+    return ChargePlan(intervals, required_kwh, planned_hours * power_kw, power_kw)
@@ -0,0 +1,66 @@
+"""Adaptive polling interval, based on how soon the data is likely to change."""
+from datetime import datetime, timedelta
+from typing import Any
+
+from .dispatch_index import DispatchIndex
+
+# The interval when neither fast nor slow polling applies, within the configured limits.
+DEFAULT_INTERVAL = timedelta(minutes=5)
+
+# Poll fast from this long before a planned dispatch starts or ends, until it did.
+DISPATCH_PROXIMITY = timedelta(minutes=30)
+
+# Poll slowly if no dispatch starts or ends within this long.
+IDLE_HORIZON = timedelta(hours=3)
+
+
+def _is_device_idle(data: dict[str, Any]) -> bool:
+    """Return whether smart charging is suspended, or there is no live vehicle device."""
+    if (data.get('registeredKrakenflexDevice') or {}).get('suspended'):
+        return True
+    devices = data.get('devices')
+    if not devices:
+        return False  # Not reported, so unknown
+    return not any(
+        device.get('deviceType') == 'ELECTRIC_VEHICLES'
+        and (device.get('status') or {}).get('current') == 'LIVE'
+        for device in devices
+        if isinstance(device, dict)
+    )
+
+
+def adaptive_update_interval(
+    data: dict[str, Any] | None,
+    dispatch_index: DispatchIndex,
+    utcnow: datetime,
+    min_interval: timedelta,
+    max_interval: timedelta,
+) -> timedelta:
+    """Return how long to wait before the next poll of the data.
+
+    Polls at `min_interval` while a bump charge is planned or in progress, or a planned
+    dispatch starts or ends within DISPATCH_PROXIMITY, as that's when dispatches change.
+    Polls at `max_interval` while smart charging is suspended, the vehicle device isn't
+    live, or no dispatch starts or ends within IDLE_HORIZON; otherwise at DEFAULT_INTERVAL.
+    The interval is shortened so that fast polling starts on time before a dispatch.
+    """
+    default_interval = min(max(DEFAULT_INTERVAL, min_interval), max_interval)
+    if data is None:
+        return default_interval
+    if dispatch_index.intervals('bump-charge').interval_from(utcnow) is not None:
+        return min_interval
+
+    intervals = dispatch_index.intervals()
+    next_boundary = min(
+        (boundary for boundary in (*intervals.starts, *intervals.ends) if boundary > utcnow),
+        default=None,
+    )
+    if next_boundary is not None and next_boundary - utcnow <= DISPATCH_PROXIMITY:
+        return min_interval
+    if _is_device_idle(data) or next_boundary is None or next_boundary - utcnow > IDLE_HORIZON:
+        interval = max_interval
+    else:
+        interval = default_interval
+    if next_boundary is not None:
+        interval = min(interval, max(next_boundary - DISPATCH_PROXIMITY - utcnow, min_interval))
+    return interval
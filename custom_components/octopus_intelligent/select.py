@@ -1,4 +1,3 @@
-from gc import callbacks
 from homeassistant.const import (
     PERCENTAGE,
 )
@@ -6,9 +5,7 @@ from homeassistant.components.select import (
     SelectEntity,
 )
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-)
+from .entity import OctopusIntelligentEntity
 from .const import DOMAIN, OCTOPUS_SYSTEM, INTELLIGENT_SOC_OPTIONS, INTELLIGENT_CHARGE_TIMES
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import callback, HomeAssistant
@@ -27,13 +24,12 @@ async def async_setup_entry(
     False)  # False: data was already fetched by __init__.py async_setup_entry()
 
 
-class OctopusIntelligentTargetSoc(CoordinatorEntity, SelectEntity):
+class OctopusIntelligentTargetSoc(OctopusIntelligentEntity, SelectEntity):
     def __init__(self, octopus_system) -> None:
         """Initialize the select."""
         super().__init__(octopus_system)
         self._unique_id = "octopus_intelligent_target_soc"
         self._name = "Octopus Target State of Charge"
-        self._octopus_system = octopus_system
 
         self._current_option = None
         self._options = list(map(lambda x: f"{x}", INTELLIGENT_SOC_OPTIONS))
@@ -44,7 +40,7 @@ class OctopusIntelligentTargetSoc(CoordinatorEntity, SelectEntity):
         """Handle updated data from the coordinator."""
         targetSoc = self._octopus_system.get_target_soc()
         self._current_option = f"{targetSoc}"
-        self.async_write_ha_state()
+        self.async_write_ha_state_if_changed()
 
     @property
     def name(self):
@@ -71,23 +67,13 @@ class OctopusIntelligentTargetSoc(CoordinatorEntity, SelectEntity):
         selectedTargetSoc = int(option.replace("%", ""))
         await self._octopus_system.async_set_target_soc(selectedTargetSoc)
         self._current_option = option
-        self.async_write_ha_state()
+        self.async_write_ha_state_if_changed()
         
     @property
     def unit_of_measurement(self) -> bool:
         """Return the unit of measurement."""
         return PERCENTAGE
 
-    @property
-    def device_info(self):
-        return {
-            "identifiers": {
-                ("AccountID", self._octopus_system.account_id),
-            },
-            "name": "Octopus Intelligent Tariff",
-            "manufacturer": "Octopus",
-        }
-
     @property
     def icon(self):
         """Icon of the entity."""
@@ -104,13 +90,12 @@ class OctopusIntelligentTargetSoc(CoordinatorEntity, SelectEntity):
     #     return BinarySensorDeviceClass.RUNNING.value
 
 
-class OctopusIntelligentTargetTime(CoordinatorEntity, SelectEntity):
+class OctopusIntelligentTargetTime(OctopusIntelligentEntity, SelectEntity):
     def __init__(self, octopus_system) -> None:
         """Initialize the select."""
         super().__init__(octopus_system)
         self._unique_id = "octopus_intelligent_target_time"
         self._name = "Octopus Target Ready By Time"
-        self._octopus_system = octopus_system
 
         self._current_option = None
         self._options = INTELLIGENT_CHARGE_TIMES
@@ -120,7 +105,7 @@ class OctopusIntelligentTargetTime(CoordinatorEntity, SelectEntity):
         """Handle updated data from the coordinator."""
         targetTime = self._octopus_system.get_target_time()
         self._current_option = targetTime
-        self.async_write_ha_state()
+        self.async_write_ha_state_if_changed()
 
     @property
     def current_option(self) -> str:
@@ -147,17 +132,7 @@ class OctopusIntelligentTargetTime(CoordinatorEntity, SelectEntity):
         selectedTargetTime = option
         await self._octopus_system.async_set_target_time(selectedTargetTime)
         self._current_option = selectedTargetTime
-        self.async_write_ha_state()
-
-    @property
-    def device_info(self):
-        return {
-            "identifiers": {
-                ("AccountID", self._octopus_system.account_id),
-            },
-            "name": "Octopus Intelligent Tariff",
-            "manufacturer": "Octopus",
-        }
+        self.async_write_ha_state_if_changed()
 
     @property
     def icon(self):
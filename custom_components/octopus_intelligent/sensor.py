@@ -1,15 +1,9 @@
-from gc import callbacks
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
 )
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-)
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.event import (
-    async_track_utc_time_change
-)
+from .entity import OctopusIntelligentEntity
 from .const import DOMAIN, OCTOPUS_SYSTEM
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import callback, HomeAssistant
@@ -35,20 +29,26 @@ async def async_setup_entry(
     ], False)  # False: data was already fetched by __init__.py async_setup_entry()
 
 
-class OctopusIntelligentNextOffpeakTime(CoordinatorEntity, SensorEntity):
+class OctopusIntelligentNextOffpeakTime(OctopusIntelligentEntity, SensorEntity):
     def __init__(self, hass, octopus_system) -> None:
         """Initialize the sensor."""
         super().__init__(octopus_system)
         self._name = "Octopus Intelligent Next Offpeak Start"
         self._unique_id = slugify(self._name)
-        self._octopus_system = octopus_system
-        self._timer = async_track_utc_time_change(
-            hass, self.timer_update, minute=range(0, 60, 30), second=1)
-        
+
         self._attributes = {}
         self._native_value = None
         self._set_native_value(log_on_error=False)
 
+    async def async_added_to_hass(self) -> None:
+        """Update the value whenever an off-peak period starts or ends."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._octopus_system.state_scheduler.async_add_listener(
+                self._octopus_system.is_off_peak_now, self.timer_update
+            )
+        )
+
     def _set_native_value(self, log_on_error = True):
         try:
             self._native_value = self._octopus_system.next_offpeak_start_utc()
@@ -62,13 +62,13 @@ class OctopusIntelligentNextOffpeakTime(CoordinatorEntity, SensorEntity):
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
         if self._set_native_value():
-            self.async_write_ha_state()
+            self.async_write_ha_state_if_changed()
 
     @callback
-    async def timer_update(self, time):
-        """Refresh state when timer is fired."""
+    def timer_update(self):
+        """Refresh state when an off-peak period starts or ends."""
         if self._set_native_value():
-            self.async_write_ha_state()
+            self.async_write_ha_state_if_changed()
     @property
     def name(self):
         """Return the name of the device."""
@@ -87,7 +87,7 @@ class OctopusIntelligentNextOffpeakTime(CoordinatorEntity, SensorEntity):
     @property
     def extra_state_attributes(self):
         """Attributes of the sensor."""
-        return self._attributes
+        return self._with_stale_data_attributes(self._attributes)
         
     @property
     def device_class(self):
@@ -95,45 +95,38 @@ class OctopusIntelligentNextOffpeakTime(CoordinatorEntity, SensorEntity):
         return SensorDeviceClass.TIMESTAMP
 
     @property
-    def device_info(self):
-        return {
-            "identifiers": {
-                ("AccountID", self._octopus_system.account_id),
-            },
-            "name": "Octopus Intelligent Tariff",
-            "manufacturer": "Octopus",
-        }        
-    @property
     def icon(self):
         """Icon of the entity."""
         return "mdi:home-clock-outline"
 
-    async def async_will_remove_from_hass(self):
-        """Unsubscribe when removed."""
-        self._timer()
 
-
-class OctopusIntelligentOffpeakEndTime(CoordinatorEntity, SensorEntity):
+class OctopusIntelligentOffpeakEndTime(OctopusIntelligentEntity, SensorEntity):
     def __init__(self, hass, octopus_system) -> None:
         """Initialize the sensor."""
         super().__init__(octopus_system)
         self._name = "Octopus Intelligent Offpeak End"
         self._unique_id = slugify(self._name)
-        self._octopus_system = octopus_system
-        self._timer = async_track_utc_time_change(
-            hass, self.timer_update, minute=range(0, 60, 30), second=1)
-        
+
         self._attributes = {}
         self._native_value = None
         self._set_native_value(log_on_error=False)
 
+    async def async_added_to_hass(self) -> None:
+        """Update the value whenever an off-peak period starts or ends."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._octopus_system.state_scheduler.async_add_listener(
+                self._octopus_system.is_off_peak_now, self.timer_update
+            )
+        )
+
     def _set_native_value(self, log_on_error = True):
         utcnow = dt_util.utcnow()
         offpeak_range = self._octopus_system.next_offpeak_range_utc()
         # Only update if we're in an offpeak window now
-        if offpeak_range["start"] <= utcnow:
+        if offpeak_range is not None and offpeak_range.start <= utcnow:
             try:
-                self._native_value = offpeak_range["end"]
+                self._native_value = offpeak_range.end
                 return True
             except:
                 if log_on_error:
@@ -144,13 +137,13 @@ class OctopusIntelligentOffpeakEndTime(CoordinatorEntity, SensorEntity):
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
         if self._set_native_value():
-            self.async_write_ha_state()
+            self.async_write_ha_state_if_changed()
 
     @callback
-    async def timer_update(self, time):
-        """Refresh state when timer is fired."""
+    def timer_update(self):
+        """Refresh state when an off-peak period starts or ends."""
         if self._set_native_value():
-            self.async_write_ha_state()
+            self.async_write_ha_state_if_changed()
 
     @property
     def name(self):
@@ -170,7 +163,7 @@ class OctopusIntelligentOffpeakEndTime(CoordinatorEntity, SensorEntity):
     @property
     def extra_state_attributes(self):
         """Attributes of the sensor."""
-        return self._attributes
+        return self._with_stale_data_attributes(self._attributes)
         
     @property
     def device_class(self):
@@ -178,20 +171,7 @@ class OctopusIntelligentOffpeakEndTime(CoordinatorEntity, SensorEntity):
         return SensorDeviceClass.TIMESTAMP
 
     @property
-    def device_info(self):
-        return {
-            "identifiers": {
-                ("AccountID", self._octopus_system.account_id),
-            },
-            "name": "Octopus Intelligent Tariff",
-            "manufacturer": "Octopus",
-        }        
-    @property
     def icon(self):
         """Icon of the entity."""
         return "mdi:timelapse"
 
-    async def async_will_remove_from_hass(self):
-        """Unsubscribe when removed."""
-        self._timer()
-
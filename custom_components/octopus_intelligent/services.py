@@ -0,0 +1,107 @@
+"""Services for Octopus Intelligent."""
+from datetime import datetime, timedelta
+import logging
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+import homeassistant.util.dt as dt_util
+
+from .const import DOMAIN, OCTOPUS_SYSTEM, PLAN_DEADLINE_MAX_DAYS
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_PLAN_WINDOW = "plan_window"
+
+ATTR_ACCOUNT_ID = "account_id"
+ATTR_REQUIRED_KWH = "required_kwh"
+ATTR_TARGET_SOC = "target_soc"
+ATTR_CURRENT_SOC = "current_soc"
+ATTR_BATTERY_SIZE_KWH = "battery_size_kwh"
+ATTR_DEADLINE = "deadline"
+ATTR_POWER_KW = "power_kw"
+
+
+def _deadline(value: datetime) -> datetime:
+    """Validate that the deadline is ahead, by at most PLAN_DEADLINE_MAX_DAYS."""
+    utcnow = dt_util.utcnow()
+    deadline = dt_util.as_utc(value)
+    if deadline <= utcnow:
+        raise vol.Invalid("The deadline is in the past")
+    if deadline - utcnow > timedelta(days=PLAN_DEADLINE_MAX_DAYS):
+        raise vol.Invalid(f"The deadline is more than {PLAN_DEADLINE_MAX_DAYS} days ahead")
+    return value
+
+
+PLAN_WINDOW_SCHEMA = vol.All(
+    vol.Schema({
+        vol.Optional(ATTR_ACCOUNT_ID): cv.string,
+        vol.Exclusive(ATTR_REQUIRED_KWH, "energy"): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Exclusive(ATTR_TARGET_SOC, "energy"): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+        vol.Optional(ATTR_CURRENT_SOC, default=0): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+        vol.Optional(ATTR_BATTERY_SIZE_KWH): vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False)),
+        vol.Required(ATTR_DEADLINE): vol.All(cv.datetime, _deadline),
+        vol.Optional(ATTR_POWER_KW): vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False)),
+    }),
+    cv.has_at_least_one_key(ATTR_REQUIRED_KWH, ATTR_TARGET_SOC),
+)
+
+
+def _get_octopus_system(hass: HomeAssistant, account_id: str | None):
+    octopus_systems = [
+        entry_data[OCTOPUS_SYSTEM]
+        for entry_data in hass.data.get(DOMAIN, {}).values()
+        if OCTOPUS_SYSTEM in entry_data
+    ]
+    if account_id is not None:
+        octopus_systems = [s for s in octopus_systems if s.account_id == account_id]
+    if not octopus_systems:
+        raise ServiceValidationError(
+            f"Octopus account {account_id} is not set up" if account_id else "No Octopus account is set up"
+        )
+    if len(octopus_systems) > 1:
+        raise ServiceValidationError("Several Octopus accounts are set up, please specify the account_id")
+    return octopus_systems[0]
+
+
+@callback
+def async_setup_services(hass: HomeAssistant):
+    """Register the Octopus Intelligent services."""
+
+    @callback
+    def async_plan_window(call: ServiceCall) -> ServiceResponse:
+        """Plan charging into the off-peak periods before a deadline."""
+        octopus_system = _get_octopus_system(hass, call.data.get(ATTR_ACCOUNT_ID))
+        required_kwh = call.data.get(ATTR_REQUIRED_KWH)
+        if required_kwh is None:
+            battery_size_kwh = (
+                call.data.get(ATTR_BATTERY_SIZE_KWH) or octopus_system.get_vehicle_battery_size_kwh()
+            )
+            if not battery_size_kwh:
+                raise ServiceValidationError("The battery size is unknown, please specify battery_size_kwh")
+            soc_delta = call.data[ATTR_TARGET_SOC] - call.data[ATTR_CURRENT_SOC]
+            required_kwh = max(0.0, battery_size_kwh * soc_delta / 100)
+        try:
+            plan = octopus_system.plan_charge(
+                call.data[ATTR_DEADLINE], required_kwh, call.data.get(ATTR_POWER_KW)
+            )
+        except ValueError as ex:
+            # e.g. the deadline passed since the call was validated
+            raise ServiceValidationError(str(ex)) from ex
+        return plan.as_dict()
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PLAN_WINDOW,
+        async_plan_window,
+        schema=PLAN_WINDOW_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
@@ -0,0 +1,110 @@
+"""Wake-ups at the instants entity states can actually change."""
+from bisect import bisect_right
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import logging
+from typing import Any
+
+import homeassistant.util.dt as dt_util
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+
+_LOGGER = logging.getLogger(__name__)
+
+# Wake up slightly after a boundary, so that the state computed is the one after it.
+BOUNDARY_DELAY = timedelta(seconds=1)
+
+
+@dataclass
+class _StateListener:
+    state_fn: Callable[[], Any]
+    update_fn: Callable[[], None]
+    offsets: tuple[timedelta, ...]
+    state: Any = None
+
+
+class StateChangeScheduler:
+    """Schedules a single timer for the next instant any entity state may change.
+
+    `get_boundaries` returns the instants (UTC) where the data changes, e.g. the start
+    and end of off-peak periods and dispatches. A listener whose state looks ahead (e.g.
+    "off-peak for the next hour") passes the look-ahead durations as `offsets`, so its
+    state can also change at `boundary - offset`. When the timer fires, every listener's
+    `state_fn` is evaluated and `update_fn` is only called if its state changed.
+    """
+
+    def __init__(self, hass: HomeAssistant, get_boundaries: Callable[[], Iterable[datetime]]):
+        self._hass = hass
+        self._get_boundaries = get_boundaries
+        self._listeners: list[_StateListener] = []
+        self._cancel_timer: CALLBACK_TYPE | None = None
+        self.next_wakeup: datetime | None = None
+
+    @callback
+    def async_add_listener(
+        self,
+        state_fn: Callable[[], Any],
+        update_fn: Callable[[], None],
+        offsets: Iterable[timedelta] = (timedelta(0),),
+    ) -> CALLBACK_TYPE:
+        """Call `update_fn` whenever the value of `state_fn` changes; returns a remove function."""
+        listener = _StateListener(state_fn, update_fn, tuple(offsets), state_fn())
+        self._listeners.append(listener)
+        self.async_reschedule()
+
+        @callback
+        def remove_listener():
+            self._listeners.remove(listener)
+            self.async_reschedule()
+
+        return remove_listener
+
+    @callback
+    def async_reschedule(self):
+        """Recompute the listener states and the next wake-up, e.g. after new data."""
+        for listener in self._listeners:
+            listener.state = listener.state_fn()
+        self._schedule()
+
+    @callback
+    def async_stop(self):
+        """Cancel the timer."""
+        if self._cancel_timer:
+            self._cancel_timer()
+            self._cancel_timer = None
+        self.next_wakeup = None
+
+    def _schedule(self):
+        self.async_stop()
+        if not self._listeners:
+            return
+        boundaries = sorted(set(self._get_boundaries()))
+        offsets = {offset for listener in self._listeners for offset in listener.offsets}
+        utcnow = dt_util.utcnow()
+        next_wakeup = None
+        for offset in offsets:
+            # The first boundary where `boundary - offset + BOUNDARY_DELAY` is in the future
+            i = bisect_right(boundaries, utcnow + offset - BOUNDARY_DELAY)
+            if i < len(boundaries):
+                when = boundaries[i] - offset + BOUNDARY_DELAY
+                if next_wakeup is None or when < next_wakeup:
+                    next_wakeup = when
+        if next_wakeup is not None:
+            self.next_wakeup = next_wakeup
+            self._cancel_timer = async_track_point_in_utc_time(
+                self._hass, self._handle_wakeup, next_wakeup
+            )
+
+    @callback
+    def _handle_wakeup(self, _now: datetime):
+        self._cancel_timer = None
+        changed = 0
+        for listener in list(self._listeners):
+            state = listener.state_fn()
+            if state != listener.state:
+                listener.state = state
+                listener.update_fn()
+                changed += 1
+        _LOGGER.debug("State boundary reached, %s of %s entities changed", changed, len(self._listeners))
+        self._schedule()
@@ -1,11 +1,8 @@
-from gc import callbacks
 from homeassistant.components.switch import (
     SwitchEntity,
 )
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-)
+from .entity import OctopusIntelligentEntity
 from .const import DOMAIN, OCTOPUS_SYSTEM
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import callback, HomeAssistant
@@ -23,32 +20,29 @@ async def async_setup_entry(
       OctopusIntelligentSmartChargeSwitch(hass.data[DOMAIN][config_entry.entry_id][OCTOPUS_SYSTEM])], 
     False)  # False: data was already fetched by __init__.py async_setup_entry()
 
-class OctopusIntelligentBumpChargeSwitch(CoordinatorEntity, SwitchEntity):
+class OctopusIntelligentBumpChargeSwitch(OctopusIntelligentEntity, SwitchEntity):
     def __init__(self, octopus_system) -> None:
         """Initialize the switch."""
         super().__init__(octopus_system)
         self._unique_id = "octopus_intelligent_bump_charge"
         self._name = "Octopus Bump Charge"
-        self._octopus_system = octopus_system
         self._is_on = octopus_system.is_boost_charging_now()
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
         self._is_on = self._octopus_system.is_boost_charging_now()
-        self.async_write_ha_state()
+        self.async_write_ha_state_if_changed()
 
     async def async_turn_on(self, **kwargs):
         """Turn the entity on."""
+        # The state is updated from the optimistically patched data
         await self._octopus_system.async_start_boost_charge()
-        self._is_on = True
-        self.async_write_ha_state()
 
     async def async_turn_off(self, **kwargs):
         """Turn the entity off."""
+        # The state is updated from the optimistically patched data
         await self._octopus_system.async_cancel_boost_charge()
-        self._is_on = False
-        self.async_write_ha_state()
 
     @property
     def is_on(self):
@@ -65,17 +59,6 @@ class OctopusIntelligentBumpChargeSwitch(CoordinatorEntity, SwitchEntity):
         """Return a unique ID."""
         return self._unique_id
 
-    @property
-    def device_info(self):
-        return {
-            "identifiers": {
-                ("AccountID", self._octopus_system.account_id),
-            },
-            "name": "Octopus Intelligent Tariff",
-            "manufacturer": "Octopus",
-        }
-
-        
     @property
     def icon(self):
         """Icon of the entity."""
@@ -91,32 +74,29 @@ class OctopusIntelligentBumpChargeSwitch(CoordinatorEntity, SwitchEntity):
     #     return BinarySensorDeviceClass.RUNNING.value
 
 
-class OctopusIntelligentSmartChargeSwitch(CoordinatorEntity, SwitchEntity):
+class OctopusIntelligentSmartChargeSwitch(OctopusIntelligentEntity, SwitchEntity):
     def __init__(self, octopus_system) -> None:
         """Initialize the switch."""
         super().__init__(octopus_system)
         self._unique_id = "octopus_intelligent_smart_charging"
         self._name = "Octopus Smart Charging"
-        self._octopus_system = octopus_system
         self._is_on = octopus_system.is_smart_charging_enabled()
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
         self._is_on = self._octopus_system.is_smart_charging_enabled()
-        self.async_write_ha_state()
+        self.async_write_ha_state_if_changed()
 
     async def async_turn_on(self, **kwargs):
         """Turn the entity on."""
+        # The state is updated from the optimistically patched data
         await self._octopus_system.async_resume_smart_charging()
-        self._is_on = True
-        self.async_write_ha_state()
 
     async def async_turn_off(self, **kwargs):
         """Turn the entity off."""
+        # The state is updated from the optimistically patched data
         await self._octopus_system.async_suspend_smart_charging()
-        self._is_on = False
-        self.async_write_ha_state()
 
     @property
     def is_on(self):
@@ -133,16 +113,6 @@ class OctopusIntelligentSmartChargeSwitch(CoordinatorEntity, SwitchEntity):
         """Return a unique ID."""
         return self._unique_id
 
-    @property
-    def device_info(self):
-        return {
-            "identifiers": {
-                ("AccountID", self._octopus_system.account_id),
-            },
-            "name": "Octopus Intelligent Tariff",
-            "manufacturer": "Octopus",
-        }
-
     @property
     def icon(self):
         """Icon of the entity."""
@@ -0,0 +1,18 @@
+"""Helpers shared by the tests."""
+from contextlib import asynccontextmanager
+import tempfile
+
+from homeassistant.core import HomeAssistant
+
+
+@asynccontextmanager
+async def async_test_home_assistant():
+    """Run a Home Assistant instance, with an empty configuration directory."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hass.config.set_time_zone("Europe/London")
+        await hass.async_start()
+        try:
+            yield hass
+        finally:
+            await hass.async_stop(force=True)
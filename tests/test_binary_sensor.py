@@ -0,0 +1,65 @@
+"""Tests of the slot sensor's state attributes."""
+from datetime import datetime, timedelta, timezone
+import json
+from types import SimpleNamespace
+
+from custom_components.octopus_intelligent.binary_sensor import (
+    RAW_DATA_ATTRIBUTES,
+    compact_slot_attributes,
+)
+from custom_components.octopus_intelligent.dispatch_index import DispatchIndex
+
+# The recorded attributes of a busy day must stay well within the recorder's limit
+# (16 kB), as they're saved on every poll.
+RECORDED_ATTRIBUTES_BUDGET_BYTES = 2048
+
+
+def _dispatches(start: datetime, count: int, source: str | None) -> list[dict]:
+    """Return half hour dispatches, one every hour so that none are merged."""
+    return [
+        {
+            "startDtUtc": str(start + timedelta(hours=i)),
+            "endDtUtc": str(start + timedelta(hours=i, minutes=30)),
+            "chargeKwh": "-3.5",
+            "meta": {"location": "AT_HOME", "source": source},
+        }
+        for i in range(count)
+    ]
+
+
+def _octopus_system(data: dict) -> SimpleNamespace:
+    return SimpleNamespace(data=data, dispatch_index=DispatchIndex(data.get("plannedDispatches")))
+
+
+def test_recorded_attributes_budget():
+    day = datetime(2024, 2, 25, tzinfo=timezone.utc)
+    data = {
+        "completedDispatches": _dispatches(day - timedelta(days=1), 24, None),
+        "plannedDispatches": _dispatches(day, 24, "smart-charge"),
+        "vehicleChargingPreferences": {"weekdayTargetSoc": 80, "weekdayTargetTime": "07:30"},
+        "registeredKrakenflexDevice": {"suspended": False, "chargePointPowerInKw": 7.4},
+    }
+    attributes = compact_slot_attributes(_octopus_system(data))
+    recorded = {key: value for key, value in attributes.items() if key not in RAW_DATA_ATTRIBUTES}
+
+    assert len(recorded["planned_dispatches"]) == 24
+    assert recorded["completed_charge_kwh"] == 84.0
+    assert recorded["planned_charge_kwh"] == 84.0
+    assert len(json.dumps(recorded)) <= RECORDED_ATTRIBUTES_BUDGET_BYTES
+    # The raw response is still available to templates
+    assert attributes["plannedDispatches"] == data["plannedDispatches"]
+
+
+def test_adjacent_dispatches_are_merged():
+    start = datetime(2024, 2, 25, 23, 30, tzinfo=timezone.utc)
+    planned = [
+        {"startDtUtc": str(start), "endDtUtc": str(start + timedelta(minutes=30))},
+        {"startDtUtc": str(start + timedelta(minutes=30)), "endDtUtc": str(start + timedelta(hours=1))},
+    ]
+    attributes = compact_slot_attributes(_octopus_system({"plannedDispatches": planned}))
+
+    assert attributes["planned_dispatches"] == [
+        [int(start.timestamp()), int((start + timedelta(hours=1)).timestamp())]
+    ]
+    assert attributes["completed_dispatches"] == []
+    assert attributes["completed_charge_kwh"] == 0.0
@@ -0,0 +1,75 @@
+"""Property tests of IntervalSet against a model of the points each set contains."""
+from datetime import datetime, timedelta, timezone
+
+from hypothesis import example, given, strategies as st
+
+from custom_components.octopus_intelligent.interval import Interval, IntervalSet
+
+BASE = datetime(2024, 3, 31, tzinfo=timezone.utc)
+
+# Interval boundaries are whole minutes, so the half minutes are never on a boundary.
+MINUTES = 40
+POINTS = [BASE + timedelta(minutes=m / 2) for m in range(-2, 2 * MINUTES + 3)]
+INNER_POINTS = POINTS[1::2]
+
+intervals = st.tuples(st.integers(0, MINUTES), st.integers(0, MINUTES)).map(
+    lambda t: (BASE + timedelta(minutes=min(t)), BASE + timedelta(minutes=max(t)))
+)
+interval_sets = st.lists(intervals, max_size=8).map(IntervalSet)
+
+
+def assert_merged(interval_set: IntervalSet):
+    """Assert that the intervals are sorted, and neither overlap nor touch."""
+    for interval in interval_set:
+        assert interval.start <= interval.end
+    for previous, interval in zip(interval_set, list(interval_set)[1:]):
+        assert previous.end < interval.start
+
+
+@given(st.lists(intervals, max_size=8))
+def test_construction(ranges):
+    interval_set = IntervalSet(ranges)
+    assert_merged(interval_set)
+    for point in POINTS:
+        assert interval_set.contains(point) == any(start <= point <= end for start, end in ranges)
+
+
+@given(interval_sets, interval_sets)
+def test_union(a, b):
+    result = a | b
+    assert_merged(result)
+    for point in POINTS:
+        assert result.contains(point) == (a.contains(point) or b.contains(point))
+
+
+@given(interval_sets, interval_sets)
+def test_intersection(a, b):
+    result = a & b
+    assert_merged(result)
+    for point in POINTS:
+        assert result.contains(point) == (a.contains(point) and b.contains(point))
+
+
+@given(interval_sets, interval_sets)
+@example(
+    IntervalSet([(BASE, BASE + timedelta(minutes=4))]),
+    IntervalSet([(BASE + timedelta(minutes=2), BASE + timedelta(minutes=2))]),
+)
+def test_difference(a, b):
+    result = a - b
+    assert_merged(result)
+    # Off the boundaries, as the result keeps those it shares with `b`
+    for point in INNER_POINTS:
+        assert result.contains(point) == (a.contains(point) and not b.contains(point))
+    for point in POINTS:
+        if result.contains(point):
+            assert a.contains(point)
+
+
+@given(interval_sets, st.sampled_from(POINTS))
+def test_interval_from(interval_set, point):
+    expected = next((i for i in interval_set if point <= i.end), None)
+    assert interval_set.interval_from(point) == expected
+    if expected is not None:
+        assert isinstance(expected, Interval)
+        assert expected.contains(point) == interval_set.contains(point)
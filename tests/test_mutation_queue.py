@@ -0,0 +1,121 @@
+"""Tests of MutationQueue."""
+import asyncio
+
+import pytest
+
+from custom_components.octopus_intelligent.mutation_queue import MutationQueue
+
+from .common import async_test_home_assistant
+
+
+class _Switch:
+    """Records the mutations sent; the first one waits until `release()`."""
+
+    def __init__(self):
+        self.sent = []
+        self.started = asyncio.Event()
+        self._released = asyncio.Event()
+        self.fail = set()
+
+    def release(self):
+        self._released.set()
+
+    def mutation(self, key, intent):
+        async def mutate():
+            self.sent.append((key, intent))
+            self.started.set()
+            await self._released.wait()
+            if (key, intent) in self.fail:
+                raise ValueError(f"{key} {intent} failed")
+            return f"{key} {intent}"
+        return mutate
+
+
+async def _request(queue, switch, results, key, intent):
+    try:
+        result = await queue.async_run(key, intent, switch.mutation(key, intent))
+    except ValueError as ex:
+        result = ex
+    results.append((intent, result))
+
+
+def _run(test):
+    async def run():
+        async with async_test_home_assistant() as hass:
+            await test(MutationQueue(hass, "test"), _Switch())
+    asyncio.run(run())
+
+
+def test_collapsed_into_running_mutation():
+    async def test(queue, switch):
+        results = []
+        tasks = [asyncio.create_task(_request(queue, switch, results, "switch", True))]
+        await switch.started.wait()
+        for intent in (False, True):
+            tasks.append(asyncio.create_task(_request(queue, switch, results, "switch", intent)))
+            await asyncio.sleep(0)
+        switch.release()
+        await asyncio.gather(*tasks)
+
+        assert switch.sent == [("switch", True)]
+        # The callers are resumed in the order of their requests
+        assert results == [(True, "switch True"), (False, "switch True"), (True, "switch True")]
+        assert queue.stats["collapsed"] == 1
+        assert queue.depth == 0
+    _run(test)
+
+
+def test_collapsed_then_queued():
+    async def test(queue, switch):
+        results = []
+        tasks = [asyncio.create_task(_request(queue, switch, results, "switch", True))]
+        await switch.started.wait()
+        for intent in (False, True, False):
+            tasks.append(asyncio.create_task(_request(queue, switch, results, "switch", intent)))
+            await asyncio.sleep(0)
+        switch.release()
+        await asyncio.gather(*tasks)
+
+        assert switch.sent == [("switch", True), ("switch", False)]
+        assert results == [
+            (True, "switch True"),
+            (False, "switch True"),
+            (True, "switch True"),
+            (False, "switch False"),
+        ]
+        assert queue.stats["executed"] == 2
+    _run(test)
+
+
+def test_failed_mutation_with_others_queued():
+    async def test(queue, switch):
+        results = []
+        switch.fail.add(("first", True))
+        tasks = [asyncio.create_task(_request(queue, switch, results, "first", True))]
+        await switch.started.wait()
+        tasks.append(asyncio.create_task(_request(queue, switch, results, "second", True)))
+        await asyncio.sleep(0)
+        switch.release()
+        await asyncio.gather(*tasks)
+
+        assert switch.sent == [("first", True), ("second", True)]
+        assert isinstance(results[0][1], ValueError)
+        assert results[1] == (True, "second True")
+        assert queue.stats["failed"] == 1
+    _run(test)
+
+
+def test_cancelled_worker_cancels_callers():
+    async def test(queue, switch):
+        running = asyncio.create_task(queue.async_run("first", True, switch.mutation("first", True)))
+        await switch.started.wait()
+        pending = asyncio.create_task(queue.async_run("second", True, switch.mutation("second", True)))
+        await asyncio.sleep(0)
+        queue._worker.cancel()
+
+        for task in (running, pending):
+            with pytest.raises(asyncio.CancelledError):
+                # Rather than waiting forever
+                await asyncio.wait_for(task, 1)
+        assert queue.depth == 0
+    _run(test)
@@ -0,0 +1,108 @@
+"""Tests of the optimistic updates of OctopusIntelligentSystem."""
+import asyncio
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import homeassistant.util.dt as dt_util
+import pytest
+
+from custom_components.octopus_intelligent.octopus_intelligent_system import (
+    OctopusIntelligentSystem,
+)
+
+from .common import async_test_home_assistant
+
+
+def _data() -> dict:
+    # A dispatch in 2 hours, so the polling is neither fast nor slow unless suspended
+    start = dt_util.utcnow().replace(microsecond=0) + timedelta(hours=2)
+    return {
+        "registeredKrakenflexDevice": {"suspended": False},
+        "plannedDispatches": [{
+            "startDtUtc": str(start),
+            "endDtUtc": str(start + timedelta(minutes=30)),
+            "meta": {"location": None, "source": "smart-charge"},
+        }],
+    }
+
+
+def _octopus_system(hass) -> OctopusIntelligentSystem:
+    octopus_system = OctopusIntelligentSystem(
+        hass,
+        api_key="key",
+        account_id="A-12345678",
+        off_peak_start=timedelta(hours=23, minutes=30),
+        off_peak_end=timedelta(hours=5, minutes=30),
+    )
+    octopus_system.client = MagicMock()
+    octopus_system._reconcile_debouncer = MagicMock(async_call=AsyncMock())
+    data = _data()
+    octopus_system._persistent_data.last_data = data
+    octopus_system.async_set_updated_data(data)
+    return octopus_system
+
+
+def test_failed_mutation_is_rolled_back():
+    async def run():
+        async with async_test_home_assistant() as hass:
+            octopus_system = _octopus_system(hass)
+            update_interval = octopus_system.update_interval
+            octopus_system.client.async_suspend_smart_charging = AsyncMock(side_effect=OSError)
+
+            with pytest.raises(OSError):
+                await octopus_system.async_suspend_smart_charging()
+
+            assert octopus_system.is_smart_charging_enabled()
+            assert octopus_system.update_interval == update_interval
+            octopus_system._reconcile_debouncer.async_call.assert_awaited()
+
+    asyncio.run(run())
+
+
+def test_failed_mutation_is_rolled_back_under_later_patch():
+    async def run():
+        async with async_test_home_assistant() as hass:
+            octopus_system = _octopus_system(hass)
+            suspending = asyncio.Event()
+            failure = asyncio.get_running_loop().create_future()
+
+            async def suspend(_account_id):
+                suspending.set()
+                await failure
+
+            octopus_system.client.async_suspend_smart_charging = suspend
+            octopus_system.client.async_trigger_boost_charge = AsyncMock()
+            suspend_task = asyncio.create_task(octopus_system.async_suspend_smart_charging())
+            await suspending.wait()
+            # Queued behind the suspension, but patches the data right away
+            boost_task = asyncio.create_task(octopus_system.async_start_boost_charge())
+            await asyncio.sleep(0)
+            assert octopus_system.is_boost_charging_now()
+
+            failure.set_exception(OSError())
+            with pytest.raises(OSError):
+                await suspend_task
+            await boost_task
+
+            assert octopus_system.is_smart_charging_enabled()
+            assert octopus_system.is_boost_charging_now()
+
+    asyncio.run(run())
+
+
+def test_plan_charge_deadline():
+    async def run():
+        async with async_test_home_assistant() as hass:
+            octopus_system = _octopus_system(hass)
+            utcnow = dt_util.utcnow()
+
+            # Beyond the off-peak horizon, the daily off-peak window is planned in
+            plan = octopus_system.plan_charge(utcnow + timedelta(days=10), 200, 7)
+            assert plan.shortfall_kwh == 0
+            assert plan.intervals[-1].start > utcnow + timedelta(days=3)
+
+            for deadline in (utcnow - timedelta(hours=1), utcnow + timedelta(days=365)):
+                with pytest.raises(ValueError):
+                    octopus_system.plan_charge(deadline, 10, 7)
+
+    asyncio.run(run())